@@ -32,8 +32,20 @@ from kate.core.server import BaseServer
 from kate.core.websocket import WebSocketHandler
 from kate.terminal import Terminal
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 _BACKGROUND_TASKS = set()
 
+_READ_SIZE = 65536
+
+# The maximum number of bytes read from the pseudo-terminal at once. A program
+# which writes without stopping would otherwise keep the event loop in the
+# reader callback forever.
+_MAX_OUTPUT_SIZE = 4 * _READ_SIZE
+
 
 class TermSocketHandler(WebSocketHandler):
     """The class represents a terminal socket handler."""
@@ -47,11 +59,26 @@ class TermSocketHandler(WebSocketHandler):
         self._fd = None
         self._io_loop = asyncio.get_running_loop()
 
+        # The buffers are allocated once and reused by every read of the
+        # pseudo-terminal.
+        self._read_buf = bytearray(_READ_SIZE)
+        self._read_view = memoryview(self._read_buf)
+        self._output = bytearray()
+
     @staticmethod
     def check_origin(_origin):
         """Enable support for allowing alternate origins."""
         return True
 
+    @staticmethod
+    def get_compression_options():
+        """Enable the permessage-deflate extension.
+
+        The HTML documents consist mostly of the same span tags, so they
+        compress very well.
+        """
+        return {}
+
     def _create(self, rows=24, cols=80):
         """Create the file descriptor.
 
@@ -107,6 +134,43 @@ class TermSocketHandler(WebSocketHandler):
 
         del TermSocketHandler.clients[fd]
 
+    def _read_output(self):
+        """Read what the terminal-oriented program has written so far.
+
+        The pseudo-terminal is drained until the read would block, so that a
+        burst of output is turned into a single HTML update (and a single
+        WebSocket frame) rather than into one update per read. No more than
+        _MAX_OUTPUT_SIZE bytes are read at once, the rest is read when the
+        reader callback fires again.
+
+        Returns:
+            The buffer with the output. The buffer is reused by the next call,
+            so it must be processed before that.
+
+        Raises:
+            OSError: If the pseudo-terminal cannot be read, for example,
+                because the program has exited.
+
+        """
+        output = self._output
+        output.clear()
+        while len(output) < _MAX_OUTPUT_SIZE:
+            try:
+                n = os.readv(self._fd, [self._read_buf])
+            except BlockingIOError:
+                break
+            except OSError:
+                if output:  # deliver what was read, the error will repeat
+                    break
+                raise
+
+            if not n:
+                break
+
+            output += self._read_view[:n]
+
+        return output
+
     # Implementing the methods inherited from
     # tornado.websocket.WebSocketHandler
 
@@ -114,14 +178,17 @@ class TermSocketHandler(WebSocketHandler):
         """Handle a new WebSocket connection."""
         def callback(*_args, **_kwargs):
             try:
-                buf = os.read(self._fd, 65536)
+                buf = self._read_output()
             except OSError:
                 for task in asyncio.all_tasks(self._io_loop):
                     task.cancel()
             else:
+                if not buf:
+                    return
+
                 client = TermSocketHandler.clients[self._fd]
                 html = client['terminal'].generate_html(buf)
-                task = self._io_loop.create_task(client['client'].write_message(html))
+                task = self._io_loop.create_task(client['client'].write_text(html))
 
                 # Create a strong reference to prevent execution from being
                 # collected by the garbage collector
@@ -154,11 +221,16 @@ class Server(BaseServer):
 
 def main():
     """Run the script."""
-    parser = argparse.ArgumentParser()
+    parser = argparse.ArgumentParser(
+        epilog='The server runs on uvloop if it is installed '
+               '(pip install kate[uvloop]) and on the default asyncio event '
+               'loop otherwise.',
+    )
     parser.add_argument('--host', default='127.0.0.1', type=str)
     parser.add_argument('--port', default=8888, type=int)
     parser.add_argument('--ssl_cert', type=Path)
     parser.add_argument('--ssl_key', type=Path)
+    parser.add_argument('--send_buffer_size', type=int)
     args = parser.parse_args()
 
     server = Server(
@@ -166,9 +238,13 @@ def main():
         port=args.port,
         ssl_cert=args.ssl_cert,
         ssl_key=args.ssl_key,
+        send_buffer_size=args.send_buffer_size,
     )
-    with contextlib.suppress(asyncio.CancelledError):
-        asyncio.run(server.start())
+    loop_factory = uvloop.new_event_loop if uvloop else None
+    # Unlike asyncio.run, asyncio.Runner accepts loop_factory on Python 3.11.
+    with contextlib.suppress(asyncio.CancelledError), \
+            asyncio.Runner(loop_factory=loop_factory) as runner:
+        runner.run(server.start())
 
 
 if __name__ == '__main__':
@@ -1,5 +1,7 @@
 """The module contains constants."""
 
+import array
+
 MAGIC_NUMBER = 0x10000000000
 # +------------------+--------------------------------------------------------+
 # | character (0-31) | 4-byte value represents a character in UTF-8 encoding. |
@@ -23,7 +25,25 @@ MAGIC_NUMBER = 0x10000000000
 # The colors section of MAGIC_NUMBER stores 7, i.e. (0, 7) or black and white.
 BLACK_AND_WHITE = MAGIC_NUMBER * 7
 
+# A blank area of the screen of any length is made by multiplying the blank
+# cell, which fills the new array in C. The array must never be modified.
+BLANK_CELL = array.array('Q', [BLACK_AND_WHITE])
+
 UNDERLINE_BIT = 32
 REVERSE_BIT = 33
 BLINK_BIT = 34
 BOLD_BIT = 36
+
+# The masks are what the hot paths test and combine _sgr and cells with, so
+# the bits are not shifted into place over and over again.
+UNDERLINE_MASK = 1 << UNDERLINE_BIT
+REVERSE_MASK = 1 << REVERSE_BIT
+BLINK_MASK = 1 << BLINK_BIT
+BOLD_MASK = 1 << BOLD_BIT
+
+# The foreground color takes the low 4 bits of the colors section and the
+# background color takes the rest, so both can be replaced without divmod.
+FG_SHIFT = 40
+BG_SHIFT = 44
+FG_MASK = 0xF << FG_SHIFT
+BG_MASK = -1 << BG_SHIFT
@@ -135,6 +135,56 @@ def parse_request_start_line(line: str) -> RequestStartLine:
     return r
 
 
+# The bytes which are allowed in methods (tchar) and in ASCII request targets
+# (VCHAR), respectively. See _ABNF.
+_TCHAR_BYTES = b"!#$%&'*+-.^_`|~0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+_VCHAR_BYTES = bytes(range(0x21, 0x7F))
+
+# The same rule as _ABNF.request_line, but matching raw request lines, so they
+# don't have to be decoded before they are validated.
+_REQUEST_LINE_BYTES = re.compile(_ABNF.request_line.pattern.encode("ascii"))
+
+
+def parse_request_start_line_fast(line: bytes) -> RequestStartLine:
+    """Same as `parse_request_start_line`, but takes the raw request line.
+
+    Plain ASCII request lines such as ``GET /foo HTTP/1.1`` are split on the
+    two spaces and validated without the regular expressions. Anything else is
+    matched against the bytes version of the request-line rule. Only the
+    request target may contain non-ASCII bytes; it is decoded as UTF-8.
+
+    >>> parse_request_start_line_fast(b"GET /foo HTTP/1.1")
+    RequestStartLine(method='GET', path='/foo', version='HTTP/1.1')
+    """
+    i = line.find(b" ")
+    j = line.find(b" ", i + 1)
+    if (
+        i > 0
+        and j > i + 1
+        and len(line) == j + 9
+        and line.startswith(b"HTTP/1.", j + 1)
+        and line[-1:].isdigit()
+        and not line[:i].translate(None, _TCHAR_BYTES)
+        and not line[i + 1 : j].translate(None, _VCHAR_BYTES)
+    ):
+        return RequestStartLine(
+            line[:i].decode("ascii"),
+            line[i + 1 : j].decode("ascii"),
+            line[j + 1 :].decode("ascii"),
+        )
+    match = _REQUEST_LINE_BYTES.fullmatch(line)
+    if not match:
+        raise HTTPInputError("Malformed HTTP request line")
+    r = RequestStartLine(
+        match.group(1).decode("ascii"),
+        match.group(2).decode(errors="replace"),
+        match.group(3).decode("ascii"),
+    )
+    if not r.version.startswith("HTTP/1"):
+        raise HTTPInputError("Unexpected HTTP version %r" % r.version)
+    return r
+
+
 # _parseparam and _parse_header are copied and modified from python2.7's cgi.py
 # The original 2.7 version of this code did not correctly support some
 # combinations of semicolons and double quotes.
@@ -191,6 +241,30 @@ def _parse_header(line: str) -> Tuple[str, Dict[str, str]]:
     return key, pdict
 
 
+def _parse_extension_header(line: str) -> Tuple[str, Dict[str, str]]:
+    """Parse a single WebSocket extension like
+    ``permessage-deflate; client_max_window_bits=10``.
+
+    Unlike `_parse_header`, the function supports only the plain
+    ``name=value`` parameters extensions use, so it doesn't pay for the
+    RFC 2231 decoding. As in `_parse_header`, parameters without values are
+    ignored.
+
+    >>> _parse_extension_header('permessage-deflate; Client_Max_Window_Bits="10"')
+    ('permessage-deflate', {'client_max_window_bits': '10'})
+    """
+    key, *parts = line.split(";")
+    pdict = {}
+    for p in parts:
+        name, sep, value = p.partition("=")
+        if sep:
+            value = value.strip()
+            if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+                value = value[1:-1]
+            pdict[name.strip().lower()] = value
+    return key.strip(), pdict
+
+
 def _encode_header(key: str, pdict: Dict[str, str]) -> str:
     """Inverse of _parse_header.
 
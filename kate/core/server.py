@@ -3,15 +3,18 @@
 import asyncio
 import contextlib
 import logging
+import socket
 import ssl
 from http import HTTPStatus
 from pathlib import Path
 
 from kate.core import websocket
-from kate.core.httputil import parse_request_start_line
+from kate.core.httputil import parse_request_start_line_fast
 
 LOGGER = logging.getLogger(__name__)
 
+_PHRASES = {status.value: status.phrase for status in HTTPStatus}
+
 
 class Response:
     """The class represents a HTTP response wrapper that encapsulates status code,
@@ -21,7 +24,7 @@ class Response:
     def __init__(self, body: bytes | str = b'', status: int = 200, headers: dict | None = None):
         """Initialize a Response object."""
         self.status = status
-        self.reason = HTTPStatus(status).phrase if status in HTTPStatus._value2member_map_ else 'OK'
+        self.reason = _PHRASES.get(status, 'OK')
         self.headers = {'Connection': 'close'}
         if headers:
             self.headers.update(headers)
@@ -40,20 +43,23 @@ class Response:
     def set_status(self, status: int, reason: str | None = None):
         """Update HTTP response status code and reason phrase."""
         self.status = status
-        self.reason = reason or (
-            HTTPStatus(status).phrase
-            if status in HTTPStatus._value2member_map_
-            else ''
-        )
+        self.reason = reason or _PHRASES.get(status, '')
 
     def to_bytes(self) -> bytes:
         """Serialize response to HTTP/1.1 wire format bytes."""
-        headers = {
-            **self.headers,
-            'Content-Length': str(len(self.body)),
-        }
-        head = [f'HTTP/1.1 {self.status} {self.reason}'] + [f'{k}: {v}' for k, v in headers.items()]
-        return ('\r\n'.join(head) + '\r\n\r\n').encode() + self.body
+        parts = [f'HTTP/1.1 {self.status} {self.reason}\r\n'.encode()]
+        parts.extend(
+            f'{k}: {v}\r\n'.encode()
+            for k, v in self.headers.items()
+            if k != 'Content-Length'  # always derived from the body below
+        )
+        if self.status < HTTPStatus.OK:
+            # Informational responses such as 101 Switching Protocols have
+            # neither a body nor Content-Length (RFC 9110, section 8.6).
+            parts.append(b'\r\n')
+        else:
+            parts.extend((b'Content-Length: %d\r\n\r\n' % len(self.body), self.body))
+        return b''.join(parts)
 
 
 class BaseServer:
@@ -67,10 +73,16 @@ class BaseServer:
         port: int = 8888,
         ssl_cert: Path | None = None,
         ssl_key: Path | None = None,
+        send_buffer_size: int | None = None,
     ):
-        """Initialize a BaseServer object."""
+        """Initialize a BaseServer object.
+
+        The ``send_buffer_size`` argument is the size of the send buffer of
+        the client connections. By default, the kernel tunes it on its own.
+        """
         self._host = host
         self._port = port
+        self._send_buffer_size = send_buffer_size
         self._ssl_context = None
 
         if ssl_cert and ssl_key:
@@ -82,16 +94,37 @@ class BaseServer:
     #
 
     @staticmethod
-    def _convert_headers_to_dict(lines):
-        """Parse HTTP header lines into key-value dictionary."""
+    def _parse_headers(buf: bytes, start: int = 0) -> dict[str, str]:
+        """Parse HTTP header lines of raw request, starting at the specified
+        offset, into key-value dictionary.
+        """
         headers = {}
-        for line in lines:
-            if ':' in line:
-                key, value = line.split(':', 1)
-                headers[key.strip()] = value.strip()
+        end = len(buf)
+        while start < end:
+            eol = buf.find(b'\r\n', start)
+            if eol == -1:
+                eol = end
+
+            colon = buf.find(b':', start, eol)
+            if colon != -1:
+                key = buf[start:colon].strip().decode('latin-1')
+                headers[key] = buf[colon + 1:eol].strip().decode('latin-1')
+
+            start = eol + 2
 
         return headers
 
+    def _configure_sockets(self, sockets):
+        """Set the send buffer size of the listening TCP sockets, if it is
+        specified, so that the client connections accepted on them inherit it.
+        """
+        if self._send_buffer_size is None:
+            return
+
+        for sock in sockets:
+            if sock.family in {socket.AF_INET, socket.AF_INET6}:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self._send_buffer_size)
+
     async def _handle_request(self, reader, writer):
         """Parse and route HTTP/WebSocket requests from client connection."""
         try:
@@ -103,15 +136,15 @@ class BaseServer:
 
             return None
 
-        header_lines = request.decode(errors='replace').split('\r\n')
-        request_line = parse_request_start_line(header_lines[0])
+        eol = request.find(b'\r\n')
+        request_line = parse_request_start_line_fast(request[:eol])
         method = request_line.method.upper()
 
         if method != 'GET':
             return await self.send_http_error(writer, 405, 'Method Not Allowed')
 
         path = request_line.path
-        headers = self._convert_headers_to_dict(header_lines[1:])
+        headers = self._parse_headers(request, eol + 2)
         if headers.get('Upgrade') and 'upgrade' in headers.get('Connection', '').lower():
             return await self._handle_websocket_request(reader, writer, headers, path)
 
@@ -140,7 +173,7 @@ class BaseServer:
     ):
         """Send HTTP error response and close connection."""
         response = Response(
-            HTTPStatus(code).phrase if message is None else message,
+            _PHRASES.get(code, '') if message is None else message,
             status=code,
             headers={'Content-Type': 'text/plain; charset=utf-8'} if headers is None else headers,
         )
@@ -161,6 +194,7 @@ class BaseServer:
         socket_server = await asyncio.start_server(
             self._handle_request, self._host, self._port, ssl=self._ssl_context,
         )
+        self._configure_sockets(socket_server.sockets)
         async with socket_server:
             LOGGER.info('Serving on http://%s:%s', self._host, self._port)
             await socket_server.serve_forever()
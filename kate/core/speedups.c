@@ -0,0 +1,194 @@
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <stdint.h>
+#include <string.h>
+
+#if (defined(__x86_64__) || defined(__i386__)) && defined(__GNUC__)
+#define HAVE_AVX2_KERNEL
+#include <immintrin.h>
+#elif defined(__aarch64__)
+#define HAVE_NEON_KERNEL
+#include <arm_neon.h>
+#endif
+
+/* The vector kernels only pay off once the payload is long enough to amortize
+ * loading the mask into a vector register. */
+#define VECTOR_MIN_SIZE 512
+
+/* A kernel masks as much of the payload as it can in whole vectors and
+ * returns the number of bytes it has processed. The number is always a
+ * multiple of 4, so the rest of the payload can be masked from there without
+ * rotating the mask. */
+typedef Py_ssize_t (*mask_kernel)(const char*, const char*, char*, Py_ssize_t);
+
+static mask_kernel vector_kernel = NULL;
+
+#if defined(HAVE_AVX2_KERNEL)
+__attribute__((target("avx2")))
+static Py_ssize_t mask_avx2(const char* mask, const char* data, char* buf, Py_ssize_t data_len) {
+    uint32_t mask32;
+    __m256i vmask;
+    Py_ssize_t i = 0;
+
+    /* Every chunk starts at a multiple of 32, so the broadcast mask is
+     * always in phase with the payload and never has to be rotated. */
+    memcpy(&mask32, mask, 4);
+    vmask = _mm256_set1_epi32((int)mask32);
+    for (; i + 128 <= data_len; i += 128) {
+        __m256i a = _mm256_loadu_si256((const __m256i*)(data + i));
+        __m256i b = _mm256_loadu_si256((const __m256i*)(data + i + 32));
+        __m256i c = _mm256_loadu_si256((const __m256i*)(data + i + 64));
+        __m256i d = _mm256_loadu_si256((const __m256i*)(data + i + 96));
+        _mm256_storeu_si256((__m256i*)(buf + i), _mm256_xor_si256(a, vmask));
+        _mm256_storeu_si256((__m256i*)(buf + i + 32), _mm256_xor_si256(b, vmask));
+        _mm256_storeu_si256((__m256i*)(buf + i + 64), _mm256_xor_si256(c, vmask));
+        _mm256_storeu_si256((__m256i*)(buf + i + 96), _mm256_xor_si256(d, vmask));
+    }
+    for (; i + 32 <= data_len; i += 32) {
+        __m256i chunk = _mm256_loadu_si256((const __m256i*)(data + i));
+        _mm256_storeu_si256((__m256i*)(buf + i), _mm256_xor_si256(chunk, vmask));
+    }
+
+    /* Avoid the AVX-SSE transition penalty in the code which runs next. */
+    _mm256_zeroupper();
+
+    return i;
+}
+#endif
+
+#if defined(HAVE_NEON_KERNEL)
+static Py_ssize_t mask_neon(const char* mask, const char* data, char* buf, Py_ssize_t data_len) {
+    uint32_t mask32;
+    uint8x16_t vmask;
+    Py_ssize_t i = 0;
+
+    memcpy(&mask32, mask, 4);
+    vmask = vreinterpretq_u8_u32(vdupq_n_u32(mask32));
+    for (; i + 16 <= data_len; i += 16) {
+        uint8x16_t chunk = vld1q_u8((const uint8_t*)(data + i));
+        vst1q_u8((uint8_t*)(buf + i), veorq_u8(chunk, vmask));
+    }
+
+    return i;
+}
+#endif
+
+/* Masks data_len bytes of data into buf. The buffers may be the same, since
+ * every word is loaded before it is stored. */
+static void mask_buffer(const char* mask, const char* data, char* buf, Py_ssize_t data_len) {
+    Py_ssize_t i = 0;
+
+    if (vector_kernel != NULL && data_len >= VECTOR_MIN_SIZE) {
+        i = vector_kernel(mask, data, buf, data_len);
+    }
+
+    {
+        uint32_t mask32;
+        uint64_t mask64;
+
+        /* The same holds for 8-byte words. memcpy compiles to plain unaligned
+         * loads and stores, so no byte-wise head is needed to align the data,
+         * which would also shift the mask out of phase. */
+        memcpy(&mask32, mask, 4);
+        mask64 = ((uint64_t)mask32 << 32) | mask32;
+        for (; i + 8 <= data_len; i += 8) {
+            uint64_t word;
+
+            memcpy(&word, data + i, 8);
+            word ^= mask64;
+            memcpy(buf + i, &word, 8);
+        }
+    }
+
+    for (; i < data_len; i++) {
+        buf[i] = data[i] ^ mask[i % 4];
+    }
+}
+
+static PyObject* websocket_mask(PyObject* self, PyObject* args) {
+    const char* mask;
+    Py_ssize_t mask_len;
+    PyObject* obj;
+    Py_buffer data;
+    PyObject* result;
+
+    if (!PyArg_ParseTuple(args, "y#O", &mask, &mask_len, &obj)) {
+        return NULL;
+    }
+
+    if (mask_len != 4) {
+        PyErr_SetString(PyExc_ValueError, "mask must be exactly 4 bytes long");
+        return NULL;
+    }
+
+    /* XOR with a zero mask is a no-op, so bytes can be returned as is. */
+    if (PyBytes_CheckExact(obj) && memcmp(mask, "\0\0\0\0", 4) == 0) {
+        Py_INCREF(obj);
+        return obj;
+    }
+
+    if (PyObject_GetBuffer(obj, &data, PyBUF_SIMPLE) < 0) {
+        return NULL;
+    }
+
+    result = PyBytes_FromStringAndSize(NULL, data.len);
+    if (result) {
+        mask_buffer(mask, data.buf, PyBytes_AsString(result), data.len);
+    }
+    PyBuffer_Release(&data);
+
+    return result;
+}
+
+static PyObject* websocket_mask_inplace(PyObject* self, PyObject* args) {
+    const char* mask;
+    Py_ssize_t mask_len;
+    Py_buffer buf;
+
+    if (!PyArg_ParseTuple(args, "y#w*", &mask, &mask_len, &buf)) {
+        return NULL;
+    }
+
+    if (mask_len != 4) {
+        PyBuffer_Release(&buf);
+        PyErr_SetString(PyExc_ValueError, "mask must be exactly 4 bytes long");
+        return NULL;
+    }
+
+    if (memcmp(mask, "\0\0\0\0", 4) != 0) {
+        mask_buffer(mask, buf.buf, buf.buf, buf.len);
+    }
+    PyBuffer_Release(&buf);
+
+    Py_RETURN_NONE;
+}
+
+static PyMethodDef methods[] = {
+    {"websocket_mask", websocket_mask, METH_VARARGS, ""},
+    {"websocket_mask_inplace", websocket_mask_inplace, METH_VARARGS, ""},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef speedupsmodule = {
+    PyModuleDef_HEAD_INIT,
+    "speedups",
+    NULL,
+    -1,
+    methods
+};
+
+PyMODINIT_FUNC
+PyInit_speedups(void) {
+    /* The extension is built for the baseline instruction set, so the vector
+     * kernel is picked by what the CPU running it supports. */
+#if defined(HAVE_AVX2_KERNEL)
+    __builtin_cpu_init();
+    if (__builtin_cpu_supports("avx2")) {
+        vector_kernel = mask_avx2;
+    }
+#elif defined(HAVE_NEON_KERNEL)
+    vector_kernel = mask_neon;
+#endif
+
+    return PyModule_Create(&speedupsmodule);
+}
@@ -10,8 +10,6 @@ interface of its subclasses, including `.AsyncHTTPClient`, `.IOLoop`,
 and `.Resolver`.
 """
 
-import array
-
 # Aliases for types that are spelled differently in different Python
 # versions. bytes_type is deprecated and no longer used in Tornado
 # itself but is left in case anyone outside Tornado is using it.
@@ -27,8 +25,30 @@ def _websocket_mask_python(mask: bytes, data: bytes) -> bytes:
 
     This pure-python implementation may be replaced by an optimized version when available.
     """
-    mask_arr = array.array("B", mask)
-    unmasked_arr = array.array("B", data)
-    for i in range(len(data)):
-        unmasked_arr[i] = unmasked_arr[i] ^ mask_arr[i % 4]
-    return unmasked_arr.tobytes()
+    if mask == b"\x00\x00\x00\x00":
+        # XOR with a zero mask is a no-op.
+        return bytes(data)
+
+    # Treat both the payload and the repeated mask as arbitrary-precision
+    # integers, so that the XOR runs over machine words in C instead of
+    # dispatching one bytecode loop iteration per byte.
+    data_len = len(data)
+    mask_bytes = mask * (data_len // 4) + mask[: data_len % 4]
+    unmasked = int.from_bytes(data, "little") ^ int.from_bytes(mask_bytes, "little")
+    return unmasked.to_bytes(data_len, "little")
+
+
+def _websocket_mask_inplace_python(mask: bytes, buf: bytearray) -> None:
+    """Same as `_websocket_mask_python`, but applies the mask to a writable
+    buffer (such as a `bytearray` or a `memoryview` of it) in place.
+    """
+    if mask != b"\x00\x00\x00\x00":
+        buf[:] = _websocket_mask_python(mask, buf)
+
+
+try:
+    from kate.core.speedups import websocket_mask as _websocket_mask
+    from kate.core.speedups import websocket_mask_inplace as _websocket_mask_inplace
+except ImportError:
+    _websocket_mask = _websocket_mask_python
+    _websocket_mask_inplace = _websocket_mask_inplace_python
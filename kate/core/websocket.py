@@ -22,8 +22,21 @@ import time
 
 from urllib.parse import urlparse
 
-from kate.core.escape import to_unicode, json_encode, utf8, native_str
-from kate.core.util import _websocket_mask_python as _websocket_mask
+try:
+    # ISA-L implements the zlib API several times faster than zlib itself.
+    from isal import isal_zlib
+except ImportError:
+    isal_zlib = None
+
+try:
+    # zlib-ng is a drop-in replacement for zlib with SIMD-accelerated
+    # kernels, which supports all the levels and unconsumed_tail.
+    from zlib_ng import zlib_ng as _zlib
+except ImportError:
+    _zlib = zlib
+
+from kate.core.escape import to_unicode, json_encode, utf8
+from kate.core.util import _websocket_mask, _websocket_mask_inplace
 from kate.core import httputil, server
 
 from typing import (
@@ -80,9 +93,35 @@ if TYPE_CHECKING:
 _default_max_message_size = 10 * 1024 * 1024
 
 # Python's GzipFile defaults to level 9, while most other gzip
-# tools (including gzip itself) default to 6, which is probably a
-# better CPU/size tradeoff.
-GZIP_LEVEL = 6
+# tools (including gzip itself) default to 6. WebSocket messages are
+# short and latency-sensitive, though: a terminal screen compresses
+# about twice as fast at level 1 and only ~13% larger than at level 6.
+# Level 1 is also within the range ISA-L handles.
+GZIP_LEVEL = zlib.Z_BEST_SPEED
+
+# The GUID which is appended to Sec-WebSocket-Key to compute
+# Sec-WebSocket-Accept (RFC 6455, section 1.3).
+_ACCEPT_MAGIC = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# Frame headers are packed and unpacked with precompiled structs, so the
+# format strings are not looked up for every frame.
+_PACK_BB = struct.Struct("!BB")
+_PACK_BBH = struct.Struct("!BBH")
+_PACK_BBQ = struct.Struct("!BBQ")
+_STRUCT_H = struct.Struct("!H")
+_STRUCT_Q = struct.Struct("!Q")
+
+# The structs of the extended payload lengths by the 7-bit length values
+# which announce them (RFC 6455, section 5.2).
+_EXTENDED_LENGTHS = {126: _STRUCT_H, 127: _STRUCT_Q}
+
+# Compression objects which compress without context takeover, keyed by their
+# parameters. Such an object ends every message with a full flush, which drops
+# its history, so all connections with the same parameters can share it
+# instead of holding a window of their own. See _PerMessageDeflateCompressor.
+_STATELESS_COMPRESSORS = {}  # type: Dict[Tuple[Any, ...], _Compressor]
+
+_b64encode = base64.b64encode
 
 LOGGER = logging.getLogger(__name__)
 
@@ -101,6 +140,13 @@ class _DecompressTooLargeError(Exception):
 
 
 class _WebSocketParams:
+    __slots__ = (
+        "ping_interval",
+        "ping_timeout",
+        "max_message_size",
+        "compression_options",
+    )
+
     def __init__(
         self,
         ping_interval: Optional[float] = None,
@@ -209,8 +255,10 @@ class WebSocketHandler:
         self.open_args = args
         self.open_kwargs = kwargs
 
+        headers = self.headers
+
         # Upgrade header should be present and should be equal to WebSocket
-        if self.headers.get("Upgrade", "").lower() != "websocket":
+        if headers.get("Upgrade", "").lower() != "websocket":
             log_msg = 'Can "Upgrade" only to "WebSocket".'
             LOGGER.debug(log_msg)
             return await self.server.send_http_error(self._writer, 400, log_msg)
@@ -218,11 +266,8 @@ class WebSocketHandler:
         # Connection header should be upgrade.
         # Some proxy servers/load balancers
         # might mess with it.
-        headers = self.headers
-        connection = map(
-            lambda s: s.strip().lower(), headers.get("Connection", "").split(",")
-        )
-        if "upgrade" not in connection:
+        connection = headers.get("Connection", "").lower().split(",")
+        if "upgrade" not in (s.strip() for s in connection):
             log_msg = '"Connection" must be "Upgrade".'
             LOGGER.debug(log_msg)
             return await self.server.send_http_error(self._writer, 400, log_msg)
@@ -231,10 +276,9 @@ class WebSocketHandler:
         # The difference between version 8 and 13 is that in 8 the
         # client sends a "Sec-Websocket-Origin" header and in 13 it's
         # simply "Origin".
-        if "Origin" in self.headers:
-            origin = self.headers.get("Origin")
-        else:
-            origin = self.headers.get("Sec-Websocket-Origin", None)
+        origin = headers.get("Origin")
+        if origin is None:
+            origin = headers.get("Sec-Websocket-Origin")
 
         # If there was an origin header, check to make sure it matches
         # according to check_origin. When the origin is None, we assume it
@@ -325,6 +369,27 @@ class WebSocketHandler:
             message = json_encode(message)
         return await self.ws_connection.write_message(message, binary=binary)
 
+    async def write_text(self, message: Union[bytes, str]) -> None:
+        """Sends the given text to the client of this Web Socket.
+
+        Same as `write_message`, but skips the checks for dicts, so it is
+        cheaper for the handlers which send text all the time. ``bytes``
+        are expected to be encoded in UTF-8 already.
+        """
+        if self.ws_connection is None or self.ws_connection.is_closing():
+            raise WebSocketClosedError()
+        return await self.ws_connection.write_data(0x1, utf8(message))
+
+    async def write_bytes(self, message: bytes) -> None:
+        """Sends the given binary message to the client of this Web Socket.
+
+        Same as `write_message` with ``binary=True``, but skips the checks
+        for dicts and strings.
+        """
+        if self.ws_connection is None or self.ws_connection.is_closing():
+            raise WebSocketClosedError()
+        return await self.ws_connection.write_data(0x2, message)
+
     def select_subprotocol(self, subprotocols: List[str]) -> Optional[str]:
         """Override to implement subprotocol negotiation.
 
@@ -358,7 +423,8 @@ class WebSocketHandler:
         will be enabled.  The contents of the dict may be used to
         control the following compression options:
 
-        ``compression_level`` specifies the compression level.
+        ``compression_level`` specifies the compression level
+        (default: `zlib.Z_BEST_SPEED`).
 
         ``mem_level`` specifies the amount of memory used for the internal compression state.
 
@@ -524,9 +590,9 @@ class WebSocketHandler:
         websocket_version = self.headers.get("Sec-WebSocket-Version")
         if websocket_version in ("7", "8", "13"):
             params = _WebSocketParams(
-                ping_interval=self.settings.get("ping_interval"),
-                ping_timeout=self.settings.get("ping_timeout"),
-                max_message_size=self.settings.get("max_message_size", _default_max_message_size),
+                ping_interval=self.ping_interval,
+                ping_timeout=self.ping_timeout,
+                max_message_size=self.max_message_size,
                 compression_options=self.get_compression_options(),
             )
             return WebSocketProtocol13(self, False, params, self._reader, self._writer)
@@ -580,6 +646,10 @@ class WebSocketProtocol(abc.ABC):
     ) -> None:
         raise NotImplementedError()
 
+    @abc.abstractmethod
+    async def write_data(self, opcode: int, message: bytes) -> None:
+        raise NotImplementedError()
+
     @property
     @abc.abstractmethod
     def selected_subprotocol(self) -> Optional[str]:
@@ -613,6 +683,14 @@ class WebSocketProtocol(abc.ABC):
 
 
 class _PerMessageDeflateCompressor:
+    __slots__ = (
+        "_max_wbits",
+        "_compression_level",
+        "_mem_level",
+        "_compressor",
+        "_flush_mode",
+    )
+
     def __init__(
         self,
         persistent: bool,
@@ -643,24 +721,58 @@ class _PerMessageDeflateCompressor:
         else:
             self._mem_level = compression_options["mem_level"]
 
+        # Without context takeover, a full flush ends every message: it emits
+        # the same empty block as a sync flush and also drops the history, so
+        # the compressor (and its window) can be reused for the next message,
+        # even by another connection. compress() never yields to the event
+        # loop between compressing and flushing, so messages cannot interleave.
         if persistent:
-            self._compressor = self._create_compressor()  # type: Optional[_Compressor]
+            self._compressor = self._create_compressor()  # type: _Compressor
+            self._flush_mode = zlib.Z_SYNC_FLUSH
         else:
-            self._compressor = None
+            key = (
+                self._compressor_module(),
+                self._compression_level,
+                self._max_wbits,
+                self._mem_level,
+            )
+            compressor = _STATELESS_COMPRESSORS.get(key)
+            if compressor is None:
+                compressor = _STATELESS_COMPRESSORS[key] = self._create_compressor()
+            self._compressor = compressor
+            self._flush_mode = zlib.Z_FULL_FLUSH
+
+    def _compressor_module(self) -> Any:
+        # ISA-L supports only the fastest compression levels, so the other
+        # ones are left to zlib-ng or zlib. Level 0 is left to them too, since
+        # it means no compression in zlib, but not in ISA-L.
+        if (
+            isal_zlib is not None
+            and 0 < self._compression_level <= isal_zlib.ISAL_BEST_COMPRESSION
+        ):
+            return isal_zlib
+        return _zlib
 
     def _create_compressor(self) -> "_Compressor":
-        return zlib.compressobj(
+        return self._compressor_module().compressobj(
             self._compression_level, zlib.DEFLATED, -self._max_wbits, self._mem_level
         )
 
     def compress(self, data: bytes) -> bytes:
-        compressor = self._compressor or self._create_compressor()
-        data = compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
-        assert data.endswith(b"\x00\x00\xff\xff")
-        return data[:-4]
+        compressor = self._compressor
+        data = compressor.compress(data)
+        tail = compressor.flush(self._flush_mode)
+        assert tail.endswith(b"\x00\x00\xff\xff")
+        # Small messages are usually buffered until the flush, which makes
+        # the concatenation unnecessary.
+        if data:
+            return data + tail[:-4]
+        return tail[:-4]
 
 
 class _PerMessageDeflateDecompressor:
+    __slots__ = ("_max_message_size", "_max_wbits", "_decompressor")
+
     def __init__(
         self,
         persistent: bool,
@@ -686,14 +798,23 @@ class _PerMessageDeflateDecompressor:
             self._decompressor = None
 
     def _create_decompressor(self) -> "_Decompressor":
-        return zlib.decompressobj(-self._max_wbits)
+        # ISA-L is not used here: it buffers the input which doesn't fit
+        # into max_length instead of returning it in unconsumed_tail, so
+        # oversized messages couldn't be detected.
+        return _zlib.decompressobj(-self._max_wbits)
 
     def decompress(self, data: bytes) -> bytes:
         decompressor = self._decompressor or self._create_decompressor()
-        result = decompressor.decompress(
-            data + b"\x00\x00\xff\xff", self._max_message_size
-        )
-        if decompressor.unconsumed_tail:
+        # The tail stripped by the compressor is fed separately, which saves
+        # copying the whole message just to append four bytes to it. The tail
+        # is an empty block, so it normally produces no output, but it may
+        # flush some. max_length=0 would mean no limit, hence the max().
+        result = decompressor.decompress(data, self._max_message_size)
+        if not decompressor.unconsumed_tail:
+            result += decompressor.decompress(
+                b"\x00\x00\xff\xff", max(self._max_message_size - len(result), 1)
+            )
+        if decompressor.unconsumed_tail or len(result) > self._max_message_size:
             raise _DecompressTooLargeError()
         return result
 
@@ -782,8 +903,12 @@ class WebSocketProtocol13(WebSocketProtocol):
         If a header is missing or have an incorrect value ValueError will be
         raised
         """
-        fields = ("Host", "Sec-WebSocket-Key", "Sec-WebSocket-Version")
-        if not all(map(lambda field: handler.headers.get(field), fields)):
+        headers = handler.headers
+        if not (
+            headers.get("Host")
+            and headers.get("Sec-WebSocket-Key")
+            and headers.get("Sec-WebSocket-Version")
+        ):
             raise ValueError("Missing/Invalid WebSocket headers")
 
     @staticmethod
@@ -791,10 +916,14 @@ class WebSocketProtocol13(WebSocketProtocol):
         """Computes the value for the Sec-WebSocket-Accept header,
         given the value for Sec-WebSocket-Key.
         """
-        sha1 = hashlib.sha1()
-        sha1.update(utf8(key))
-        sha1.update(b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11")  # Magic value
-        return native_str(base64.b64encode(sha1.digest()))
+        if not isinstance(key, bytes):
+            # The server decodes headers as Latin-1, so this gives back the
+            # bytes the client sent.
+            key = key.encode("latin-1")
+        # The handshake only uses SHA-1 as a checksum, so it is exempt from
+        # the checks FIPS-enabled builds of OpenSSL do for security hashes.
+        digest = hashlib.sha1(key + _ACCEPT_MAGIC, usedforsecurity=False).digest()
+        return _b64encode(digest).decode("ascii")
 
     def _challenge_response(self, handler: WebSocketHandler) -> str:
         return WebSocketProtocol13.compute_accept_value(
@@ -855,7 +984,7 @@ class WebSocketProtocol13(WebSocketProtocol):
     ) -> List[Tuple[str, Dict[str, str]]]:
         extensions = headers.get("Sec-WebSocket-Extensions", "")
         if extensions:
-            return [httputil._parse_header(e.strip()) for e in extensions.split(",")]
+            return [httputil._parse_extension_header(e) for e in extensions.split(",")]
         return []
 
     def _process_server_headers(
@@ -926,6 +1055,39 @@ class WebSocketProtocol13(WebSocketProtocol):
             ),
         )
 
+    def _build_frame(self, first_byte: int, data: bytes) -> bytearray:
+        """Builds a frame with the given first header byte and payload.
+
+        The frame is assembled in a buffer of its final size, so the payload
+        is copied only once instead of being concatenated to the header, and
+        is masked where it is.
+        """
+        data_len = len(data)
+        if self.mask_outgoing:
+            mask_bit = 0x80
+        else:
+            mask_bit = 0
+        if data_len < 126:
+            header = _PACK_BB
+            args = (data_len | mask_bit,)
+        elif data_len <= 0xFFFF:
+            header = _PACK_BBH
+            args = (126 | mask_bit, data_len)
+        else:
+            header = _PACK_BBQ
+            args = (127 | mask_bit, data_len)
+        start = header.size
+        if self.mask_outgoing:
+            start += 4
+        frame = bytearray(start + data_len)
+        header.pack_into(frame, 0, first_byte, *args)
+        frame[start:] = data
+        if self.mask_outgoing:
+            mask = os.urandom(4)
+            frame[header.size : start] = mask
+            _websocket_mask_inplace(mask, memoryview(frame)[start:])
+        return frame
+
     async def _write_frame(
         self, fin: bool, opcode: int, data: bytes, flags: int = 0
     ) -> None:
@@ -941,25 +1103,16 @@ class WebSocketProtocol13(WebSocketProtocol):
             finbit = self.FIN
         else:
             finbit = 0
-        frame = struct.pack("B", finbit | opcode | flags)
-        if self.mask_outgoing:
-            mask_bit = 0x80
-        else:
-            mask_bit = 0
-        if data_len < 126:
-            frame += struct.pack("B", data_len | mask_bit)
-        elif data_len <= 0xFFFF:
-            frame += struct.pack("!BH", 126 | mask_bit, data_len)
-        else:
-            frame += struct.pack("!BQ", 127 | mask_bit, data_len)
-        if self.mask_outgoing:
-            mask = os.urandom(4)
-            data = mask + _websocket_mask(mask, data)
-        frame += data
+        frame = self._build_frame(finbit | opcode | flags, data)
         self._wire_bytes_out += len(frame)
 
         self._writer.write(frame)
-        await self._writer.drain()
+        # drain() waits only while the transport has paused writing, which it
+        # never does with an empty buffer, so the await can be saved then.
+        # When the transport is closing, drain() reports the lost connection.
+        transport = self._writer.transport
+        if transport.is_closing() or transport.get_write_buffer_size():
+            await self._writer.drain()
 
     async def write_message(
         self, message: Union[str, bytes, Dict[str, Any]], binary: bool = False
@@ -973,6 +1126,10 @@ class WebSocketProtocol13(WebSocketProtocol):
             message = json_encode(message)
         message = utf8(message)
         assert isinstance(message, bytes)
+        await self.write_data(opcode, message)
+
+    async def write_data(self, opcode: int, message: bytes) -> None:
+        """Sends the given text (0x1) or binary (0x2) message."""
         self._message_bytes_out += len(message)
         flags = 0
         if self._compressor:
@@ -1009,7 +1166,7 @@ class WebSocketProtocol13(WebSocketProtocol):
     async def _receive_frame(self) -> None:
         # Read the frame header.
         data = await self._read_bytes(2)
-        header, mask_payloadlen = struct.unpack("BB", data)
+        header, mask_payloadlen = data
         is_final_frame = header & self.FIN
         reserved_bits = header & self.RSV_MASK
         opcode = header & self.OPCODE_MASK
@@ -1018,13 +1175,15 @@ class WebSocketProtocol13(WebSocketProtocol):
             # Compression flag is present in the first frame's header,
             # but we can't decompress until we have all the frames of
             # the message.
-            self._frame_compressed = bool(reserved_bits & self.RSV1)
+            self._frame_compressed = (reserved_bits & self.RSV1) != 0
             reserved_bits &= ~self.RSV1
         if reserved_bits:
             # client is using as-yet-undefined extensions; abort
             await self._abort()
             return
-        is_masked = bool(mask_payloadlen & 0x80)
+        # The mask bit is the high bit of the byte, so a comparison gives the
+        # flag as a bool without a call to bool().
+        is_masked = mask_payloadlen >= 0x80
         payloadlen = mask_payloadlen & 0x7F
 
         # Parse and validate the length.
@@ -1032,14 +1191,20 @@ class WebSocketProtocol13(WebSocketProtocol):
             # control frames must have payload < 126
             await self._abort()
             return
-        if payloadlen < 126:
+        # The extended payload length and the mask are read at once, which
+        # saves a read (and a trip through the stream reader) per frame.
+        extended_length = _EXTENDED_LENGTHS.get(payloadlen)
+        size = 4 if is_masked else 0
+        if extended_length is None:
             self._frame_length = payloadlen
-        elif payloadlen == 126:
-            data = await self._read_bytes(2)
-            payloadlen = struct.unpack("!H", data)[0]
-        elif payloadlen == 127:
-            data = await self._read_bytes(8)
-            payloadlen = struct.unpack("!Q", data)[0]
+        else:
+            size += extended_length.size
+        if size:
+            data = await self._read_bytes(size)
+            if extended_length is not None:
+                payloadlen = extended_length.unpack_from(data)[0]
+            if is_masked:
+                self._frame_mask = data[-4:]
         new_len = payloadlen
         if self._fragmented_message_buffer is not None:
             new_len += len(self._fragmented_message_buffer)
@@ -1049,10 +1214,10 @@ class WebSocketProtocol13(WebSocketProtocol):
             return
 
         # Read the payload, unmasking if necessary.
-        if is_masked:
-            self._frame_mask = await self._read_bytes(4)
         data = await self._read_bytes(payloadlen)
-        if is_masked:
+        # The fragments of a message are unmasked in place once they are in
+        # the fragmented message buffer, so they are not copied twice.
+        if is_masked and opcode != 0 and (is_final_frame or opcode_is_control):
             assert self._frame_mask is not None
             data = _websocket_mask(self._frame_mask, data)
 
@@ -1070,10 +1235,16 @@ class WebSocketProtocol13(WebSocketProtocol):
                 # nothing to continue
                 await self._abort()
                 return
+            start = len(self._fragmented_message_buffer)
             self._fragmented_message_buffer.extend(data)
+            if is_masked:
+                self._unmask_fragment(start)
             if is_final_frame:
+                # The buffer is handed over as is: text and compressed
+                # messages are decoded from it anyway, so only binary
+                # messages are copied to bytes, in _handle_message.
                 opcode = self._fragmented_message_opcode
-                data = bytes(self._fragmented_message_buffer)
+                data = self._fragmented_message_buffer
                 self._fragmented_message_buffer = None
         else:  # start of new data message
             if self._fragmented_message_buffer is not None:
@@ -1083,13 +1254,26 @@ class WebSocketProtocol13(WebSocketProtocol):
             if not is_final_frame:
                 self._fragmented_message_opcode = opcode
                 self._fragmented_message_buffer = bytearray(data)
+                if is_masked:
+                    self._unmask_fragment(0)
 
         if is_final_frame:
             handled_future = self._handle_message(opcode, data)
             if handled_future is not None:
                 await handled_future
 
-    async def _handle_message(self, opcode: int, data: bytes) -> "Optional[Future[None]]":
+    def _unmask_fragment(self, start: int) -> None:
+        """Unmasks the fragment which starts at the given offset of
+        the fragmented message buffer.
+        """
+        assert self._fragmented_message_buffer is not None
+        assert self._frame_mask is not None
+        with memoryview(self._fragmented_message_buffer) as view:
+            _websocket_mask_inplace(self._frame_mask, view[start:])
+
+    async def _handle_message(
+        self, opcode: int, data: Union[bytes, bytearray]
+    ) -> "Optional[Future[None]]":
         """Execute on_message, returning its Future if it is a coroutine."""
         if self.client_terminated:
             return None
@@ -1115,12 +1299,12 @@ class WebSocketProtocol13(WebSocketProtocol):
         elif opcode == 0x2:
             # Binary data
             self._message_bytes_in += len(data)
-            return await self.handler.on_message(data)
+            return await self.handler.on_message(bytes(data))
         elif opcode == 0x8:
             # Close
             self.client_terminated = True
             if len(data) >= 2:
-                self.close_code = struct.unpack(">H", data[:2])[0]
+                self.close_code = _STRUCT_H.unpack_from(data)[0]
             if len(data) > 2:
                 self.close_reason = to_unicode(data[2:])
             # Echo the received close code, if any (RFC 6455 section 5.5.1).
@@ -1149,7 +1333,7 @@ class WebSocketProtocol13(WebSocketProtocol):
                 if code is None:
                     close_data = b""
                 else:
-                    close_data = struct.pack(">H", code)
+                    close_data = _STRUCT_H.pack(code)
                 if reason is not None:
                     close_data += utf8(reason)
                 try:
@@ -1175,13 +1359,11 @@ class WebSocketProtocol13(WebSocketProtocol):
         return self._writer.is_closing() or self.client_terminated or self.server_terminated
 
     def set_nodelay(self, value: bool) -> None:
-        if self.handler.server.socket is not None and self.handler.server.socket.family in (
-            socket.AF_INET,
-            socket.AF_INET6,
-        ):
-            self.handler.server.socket.setsockopt(
-                socket.IPPROTO_TCP, socket.TCP_NODELAY, 1 if value else 0
-            )
+        # The option belongs to the socket of the connection. BaseServer
+        # enables it when it accepts the connection.
+        sock = self._writer.get_extra_info("socket")
+        if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1 if value else 0)
 
     @property
     def ping_interval(self) -> float:
@@ -22,8 +22,14 @@ class ContentMixin:
 
     def _cap_ich(self, n):
         """Insert ``n`` number of blank characters."""
-        for i in range(n):
-            self._scroll_right(self._cur_x + i, self._cur_y)
+        cur_x, cur_y = self._cur_x, self._cur_y
+        # The characters pushed beyond the right margin are lost, so the rest
+        # of the line is moved in one go instead of cell by cell.
+        n = min(n, self._cols - cur_x)
+        if n > 0:
+            self._poke((cur_x + n, cur_y),
+                       self._peek((cur_x, cur_y), (self._cols - n, cur_y)))
+            self._zero((cur_x, cur_y), (cur_x + n, cur_y))
 
     def _cap_dl(self, n):
         """Delete ``n`` number of lines.
@@ -37,8 +43,11 @@ class ContentMixin:
         capabilities are always used together.
         """
         if self._top_most <= self._cur_y <= self._bottom_most:
-            for _ in range(n):
-                self._scroll_up(self._cur_y + 1, self._bottom_most)
+            # Deleting more lines than there are below the cursor just clears
+            # them, so the area is moved in one go instead of line by line.
+            n = min(n, self._bottom_most - self._cur_y + 1)
+            if n > 0:
+                self._scroll_up(self._cur_y + n, self._bottom_most, n)
 
     def _cap_dl1(self):
         """Delete a line."""
@@ -46,9 +55,11 @@ class ContentMixin:
 
     def _cap_il(self, n):
         """Add ``n`` number of new blank lines."""
-        for _ in range(n):
-            if self._cur_y < self._bottom_most:
-                self._scroll_down(self._cur_y, self._bottom_most)
+        if self._cur_y < self._bottom_most:
+            # See _cap_dl.
+            n = min(n, self._bottom_most - self._cur_y + 1)
+            if n > 0:
+                self._scroll_down(self._cur_y, self._bottom_most, n)
 
     def _cap_il1(self):
         """Add a new blank line."""
@@ -61,8 +72,12 @@ class ContentMixin:
         region. After executing the method, the cursor position is undefined.
         See _cap_sc and _cap_rc.
 
-        The ``top`` and ``bottom`` values start from 1.
+        The ``top`` and ``bottom`` values start from 1. As in ECMA-48, 0 means
+        the default value, i.e. the first and the last line respectively.
         """
+        top = max(1, top)
+        bottom = bottom or self._rows
+
         self._top_most = min(self._bottom_most, top - 1)
         self._bottom_most = min(self._bottom_most, bottom - 1)
 
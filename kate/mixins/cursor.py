@@ -41,8 +41,15 @@ class CursorMixin:
 
     def _cap_cuf(self, n):
         """Move the cursor right by ``n`` number of positions."""
-        for _ in range(n):
-            self._cursor_right()
+        # The same as calling _cursor_right n times: the cursor stops at the
+        # right side of the screen, reaching the end of the line.
+        if n > 0:
+            x = self._cur_x + n
+            if x < self._cols:
+                self._cur_x = x
+            else:
+                self._cur_x = max(self._cur_x, self._right_most)
+                self._eol = True
 
     def _cap_home(self):
         """Move the cursor to the home position."""
@@ -52,9 +59,8 @@ class CursorMixin:
 
     def _cap_ht(self):
         """Tab to the next 8-space hardware tab stop."""
-        x = self._cur_x + 8
-        q, _ = divmod(x, 8)
-        self._cur_x = (q * 8) % self._cols
+        # Clearing the lowest 3 bits rounds down to a multiple of 8.
+        self._cur_x = ((self._cur_x + 8) & ~7) % self._cols
 
     def _cap_cup(self, y, x):
         """Set the vertical and horizontal positions of the cursor to ``y``
@@ -68,17 +74,17 @@ class CursorMixin:
     def _cap_hpa(self, x):
         """Set the horizontal position of the cursor to ``x``. See _cap_vpa.
 
-        The ``x`` value starts from 1.
+        The ``x`` value starts from 1. As in ECMA-48, 0 is treated as 1.
         """
-        self._cur_x = min(self._right_most, x - 1)
+        self._cur_x = max(0, min(self._right_most, x - 1))
         self._eol = False  # it's necessary to reset _eol after preceding echo
 
     def _cap_vpa(self, y):
         """Set the vertical position of the cursor to ``y``. See _cap_hpa.
 
-        The ``y`` value starts from 1.
+        The ``y`` value starts from 1. As in ECMA-48, 0 is treated as 1.
         """
-        self._cur_y = min(self._bottom_most, y - 1)
+        self._cur_y = max(0, min(self._bottom_most, y - 1))
 
     def _cap_kcub1(self):
         """Handle a Left Arrow key-press."""
@@ -110,17 +116,15 @@ class CursorMixin:
         """
         if self._top_most <= self._cur_y <= self._bottom_most:
             self._eol = False
-            q, r = divmod(self._cur_y + 1, self._bottom_most + 1)
-            if q:
+            if self._cur_y == self._bottom_most:
                 self._scroll_up(self._top_most + 1, self._bottom_most)
-                self._cur_y = self._bottom_most
             else:
-                self._cur_y = r
+                self._cur_y += 1
 
     def _cursor_right(self):
         """Move the cursor right by 1 position."""
-        q, r = divmod(self._cur_x + 1, self._cols)
-        if q:
-            self._eol = True
+        x = self._cur_x + 1
+        if x < self._cols:
+            self._cur_x = x
         else:
-            self._cur_x = r
+            self._eol = True
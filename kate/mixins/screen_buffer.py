@@ -1,8 +1,6 @@
 """The module provides a mixin for working directly with the internal screen buffer."""
 
-import array
-
-from kate.constants import BLACK_AND_WHITE
+from kate.constants import BLANK_CELL
 
 
 class ScreenBufferMixin:
@@ -48,28 +46,34 @@ class ScreenBufferMixin:
         begin = self._cols * y1 + x1
         end = self._cols * y2 + x2 + (1 if inclusively else 0)
         length = end - begin  # the length of the area which have to be cleared
-        self._screen[begin:end] = array.array('Q', [BLACK_AND_WHITE] * length)
+        self._screen[begin:end] = BLANK_CELL * length
         return length
 
-    def _scroll_down(self, y1, y2):
-        """Move the area specified by coordinates 0, ``y1`` and 0, ``y2`` down
-        1 row.
+    def _move(self, dst, src, length):
+        """Move ``length`` cells of the screen from the offset ``src`` to the
+        offset ``dst``. The areas may overlap.
+
+        Unlike a slice assignment of the array to itself, copying through a
+        memoryview doesn't make a temporary copy of the moved area.
         """
-        line = self._peek((0, y1), (self._cols, y2 - 1))
-        self._poke((0, y1 + 1), line)
-        self._zero((0, y1), (self._cols, y1))
+        if length > 0:
+            screen = memoryview(self._screen)
+            screen[dst:dst + length] = screen[src:src + length]
+            screen.release()
 
-    def _scroll_right(self, x, y):
-        """Move a piece of a row specified by coordinates ``x`` and ``y``
-        right by 1 position.
+    def _scroll_down(self, y1, y2, n=1):
+        """Move the area specified by coordinates 0, ``y1`` and 0, ``y2`` down
+        ``n`` rows.
         """
-        self._poke((x + 1, y), self._peek((x, y), (self._cols, y)))
-        self._zero((x, y), (x, y), inclusively=True)
+        cols = self._cols
+        self._move(cols * (y1 + n), cols * y1, cols * (y2 - n - y1 + 1))
+        self._zero((0, y1), (cols, y1 + n - 1))
 
-    def _scroll_up(self, y1, y2):
-        """Move the area specified by coordinates 0, ``y1`` and 0, ``y2`` up 1
-        row.
+    def _scroll_up(self, y1, y2, n=1):
+        """Move the area specified by coordinates 0, ``y1`` and 0, ``y2`` up
+        ``n`` rows.
         """
-        area = self._peek((0, y1), (self._right_most, y2), inclusively=True)
-        self._poke((0, y1 - 1), area)  # move the area up 1 row (y1 - 1)
-        self._zero((0, y2), (self._cols, y2))
+        cols = self._cols
+        # move the area up n rows (y1 - n)
+        self._move(cols * (y1 - n), cols * y1, cols * (y2 - y1 + 1))
+        self._zero((0, y2 - n + 1), (cols, y2))
@@ -3,50 +3,56 @@
 # ruff: noqa: PLR2004
 
 from kate.constants import (
+    BG_MASK,
+    BG_SHIFT,
     BLACK_AND_WHITE,
-    BLINK_BIT,
-    BOLD_BIT,
-    MAGIC_NUMBER,
-    REVERSE_BIT,
-    UNDERLINE_BIT,
+    BLINK_MASK,
+    BOLD_MASK,
+    FG_MASK,
+    FG_SHIFT,
+    REVERSE_MASK,
+    UNDERLINE_MASK,
 )
 
+# The capabilities setting the attribute parameters of SGR.
+_ATTRIBUTES = {
+    1: 'bold',
+    2: 'dim',
+    4: 'smul',
+    5: 'blink',
+    7: 'rev',
+    10: 'rmpch',
+    11: 'smpch',
+    24: 'rmul',
+    27: 'rmso',
+}
+
+# The parameters of SGR resetting the colors and the attributes.
+_RESET_COLORS = frozenset((0, 39, 49))
+
 
 class VisualAttributesMixin:
     """The mixin contains methods related to visual attributes."""
 
     def _set_bg_color(self, color):
         """Set the background color."""
-        color_bits, _ = divmod(self._sgr, MAGIC_NUMBER)
-        _, fg = divmod(color_bits, 16)
-        new_color_bits = color * 16 + fg
-        self._sgr &= ~(color_bits << 40)  # clear color bits
-        self._sgr |= new_color_bits << 40  # update bg and fg colors
+        self._sgr = (self._sgr & ~BG_MASK) | color << BG_SHIFT
 
     def _set_fg_color(self, color):
         """Set the foreground color."""
-        color_bits, _ = divmod(self._sgr, MAGIC_NUMBER)
-        bg, _ = divmod(color_bits, 16)
-
         # bold also means extra bright, so if the corresponding bit is set, we
         # have to switch to the bright color scheme.
-        if self._sgr & (1 << BOLD_BIT):
+        if self._sgr & BOLD_MASK:
             color += 8
 
-        new_color_bits = bg * 16 + color
-        self._sgr &= ~(color_bits << 40)  # clear color bits
-        self._sgr |= new_color_bits << 40  # update bg and fg colors
+        self._sgr = (self._sgr & ~FG_MASK) | color << FG_SHIFT
 
     def _set_color(self, color):
-        if color == 0:
-            self._sgr = BLACK_AND_WHITE
-        elif 30 <= color <= 37:  # setaf
+        if 30 <= color <= 37:  # setaf
             self._set_fg_color(color - 30)
-        elif color == 39:
-            self._sgr = BLACK_AND_WHITE
         elif 40 <= color <= 47:  # setab
             self._set_bg_color(color - 40)
-        elif color == 49:
+        elif color in _RESET_COLORS:
             self._sgr = BLACK_AND_WHITE
 
     def _set_color_pair(self, p1, p2):
@@ -67,28 +73,13 @@ class VisualAttributesMixin:
 
     def _set_attribute(self, p1):
         """Set attribute parameters of SGR."""
-        if p1 == 1:
-            self._cap_bold()
-        elif p1 == 2:
-            self._cap_dim()
-        elif p1 == 4:
-            self._cap_smul()
-        elif p1 == 5:
-            self._cap_blink()
-        elif p1 == 7:
-            self._cap_rev()
-        elif p1 == 10:
-            self._cap_rmpch()
-        elif p1 == 11:
-            self._cap_smpch()
-        elif p1 == 24:
-            self._cap_rmul()
-        elif p1 == 27:
-            self._cap_rmso()
+        name = _ATTRIBUTES.get(p1)
+        if name is not None:
+            self._exec_method(name)
 
     def _cap_bold(self):
         """Produce bold text."""
-        self._set_bit(BOLD_BIT)
+        self._sgr |= BOLD_MASK
         self._set_color(37)
 
     def _cap_dim(self):
@@ -96,19 +87,19 @@ class VisualAttributesMixin:
 
     def _cap_smul(self):
         """Enter Underline mode. See _cap_rmul."""
-        self._set_bit(UNDERLINE_BIT)
+        self._sgr |= UNDERLINE_MASK
 
     def _cap_rmul(self):
         """Exit Underline mode. See _cap_smul."""
-        self._clean_bit(UNDERLINE_BIT)
+        self._sgr &= ~UNDERLINE_MASK
 
     def _cap_blink(self):
         """Produce blinking text."""
-        self._set_bit(BLINK_BIT)
+        self._sgr |= BLINK_MASK
 
     def _cap_rev(self):
         """Enable Reverse Video mode."""
-        self._set_bit(REVERSE_BIT)
+        self._sgr |= REVERSE_MASK
 
     def _cap_rmpch(self):
         """Exit PC character display mode. See _cap_smpch."""
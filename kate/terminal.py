@@ -15,22 +15,165 @@
 
 """The module contains the terminal implementation."""
 
+import array
+import codecs
 import html
 import json
 import logging
 import re
+import sys
+from functools import lru_cache
+from itertools import groupby
 from pathlib import Path
+from types import MappingProxyType
 
 from kate import mixins
 from kate.constants import (
-    BLINK_BIT,
-    BOLD_BIT,
-    MAGIC_NUMBER,
-    REVERSE_BIT,
-    UNDERLINE_BIT,
+    BG_SHIFT,
+    BLINK_MASK,
+    BOLD_MASK,
+    FG_SHIFT,
+    REVERSE_MASK,
+    UNDERLINE_MASK,
 )
 
 
+class _SequenceNode:
+    """The class represents a node of the escape sequences trie.
+
+    A node has children keyed by the characters which may follow it and,
+    optionally, the ``number`` child which is taken when a numeric parameter
+    (``%d`` in linux_console.json) starts. The ``capability`` field holds a
+    pair of the priority and the name of the capability if a sequence ends at
+    the node.
+    """
+
+    __slots__ = ('capability', 'children', 'number')
+
+    def __init__(self):
+        """Initialize a _SequenceNode object."""
+        self.capability = None
+        self.children = {}
+        self.number = None
+
+    def insert(self, sequence, capability, priority):
+        """Add the specified ``sequence`` to the trie rooted at the node."""
+        node = self
+        for part in re.findall(r'%d|.', sequence, re.DOTALL):
+            if part == '%d':
+                if node.number is None:
+                    node.number = _SequenceNode()
+                node = node.number
+            else:
+                node = node.children.setdefault(part, _SequenceNode())
+
+        if node.capability is None or priority < node.capability[0]:
+            node.capability = (priority, capability)
+
+
+def _load_sequences():
+    """Read the control characters and escape sequences from linux_console.json
+    and prepare them for matching.
+
+    Returns:
+        A tuple of two items: the mapping of control characters to
+        capabilities and the root of the trie containing both static escape
+        sequences and escape sequences with parameters.
+
+    """
+    linux_console = Path(
+        Path(__file__).parent / 'linux_console.json',
+    ).read_text(encoding='utf-8')
+    linux_console = re.sub(r'//.*', '', linux_console)  # remove comments
+    sequences = json.loads(linux_console)
+
+    control_characters = {int(k): v for k, v in sequences['control_characters'].items()}
+
+    # Static sequences take precedence over the sequences with parameters,
+    # which, in turn, are tried in the order they appear in the file.
+    escape_sequences = _SequenceNode()
+    for k, v in sequences['escape_sequences'].items():
+        escape_sequences.insert(k.replace('\\E', '\x1b'), v, 0)
+
+    for i, (k, v) in enumerate(sequences['escape_sequences_re'].items(), 1):
+        escape_sequences.insert(k.replace('\\E', '\x1b'), v, i)
+
+    return MappingProxyType(control_characters), escape_sequences
+
+
+# The sequences are the same for every terminal, so they are read and compiled
+# only once, when the module is imported, and shared between all instances.
+_CONTROL_CHARACTERS, _ESCAPE_SEQUENCES = _load_sequences()
+
+# Matches the characters which interrupt plain text: the control characters
+# and the escape character.
+_SPECIAL_CHARACTERS_RE = re.compile(
+    '[{}]'.format(re.escape(''.join(chr(c) for c in [*_CONTROL_CHARACTERS, 0x1B]))),
+)
+
+
+# The index of the 32-bit word holding the high bits of a cell, the indices of
+# the bytes of its low word, from the lowest one, and the UTF-32 encoding the
+# low words are in depend on the byte order.
+if sys.byteorder == 'little':
+    _HIGH_WORD, _LOW_BYTES = 1, (0, 1, 2, 3)
+    _UTF32 = 'utf-32-le'
+else:
+    _HIGH_WORD, _LOW_BYTES = 0, (7, 6, 5, 4)
+    _UTF32 = 'utf-32-be'
+
+# The number of characters from which it is cheaper to fill the cells through
+# a memoryview than to make them one by one.
+_LONG_RUN = 24
+
+
+def _make_cells(sgr, text):
+    """Return the cells holding the characters of ``text`` with the emphasis,
+    modes and colors specified by ``sgr``.
+    """
+    if len(text) < _LONG_RUN:
+        return array.array('Q', [sgr | ord(c) for c in text])
+
+    # The low 32 bits of a cell are the character, while the high ones come
+    # from sgr, so the text encoded in UTF-32 is copied to the low words.
+    cells = array.array('Q', [sgr]) * len(text)
+    with memoryview(cells) as view, view.cast('B') as raw, raw.cast('I') as words:
+        words[1 - _HIGH_WORD::2] = memoryview(text.encode(_UTF32, 'surrogatepass')).cast('I')
+
+    return cells
+
+
+@lru_cache(maxsize=1024)
+def _get_classes(key, *, cursor=False):
+    """Return the CSS classes of the cells which high 32 bits (the emphasis,
+    modes and colors) are equal to ``key``. If ``cursor`` is True, the classes
+    of the cursor are returned.
+
+    There are only a few different keys on a screen, so the classes are
+    remembered across the calls to _build_html.
+    """
+    fg = (key >> (FG_SHIFT - 32)) & 0xF
+    bg = key >> (BG_SHIFT - 32)
+    cell = key << 32
+    if cell & REVERSE_MASK:
+        bg, fg = fg, bg
+
+    if cursor:
+        bg, fg = 1, 7
+
+    classes = [f'b{bg}', f'f{fg}']
+    if cell & UNDERLINE_MASK:
+        classes.append('underline')
+
+    if cell & BLINK_MASK:
+        classes.append('blink')
+
+    if cell & BOLD_MASK:
+        classes.append('bold')
+
+    return ' '.join(classes)
+
+
 class Terminal(
     mixins.ContentMixin,
     mixins.CoreMixin,
@@ -77,33 +220,21 @@ class Terminal(
         self._logger = logging.getLogger('tornado.application')
 
         self._buf = ''
-        self._outbuf = ''
-
-        linux_console = Path(
-            Path(__file__).parent / 'linux_console.json',
-        ).read_text(encoding='utf-8')
-        linux_console = re.sub(r'//.*', '', linux_console)  # remove comments
-        sequences = json.loads(linux_console)
-
-        self.control_characters = {int(k): v for k, v in sequences['control_characters'].items()}
-
-        self._escape_sequences = {}
-        for k, v in sequences['escape_sequences'].items():
-            self._escape_sequences[k.replace('\\E', '\x1b')] = v
-
-        self._escape_sequences_re = []
-        for k, v in sequences['escape_sequences_re'].items():
-            sequence = k.replace(
-                '\\E', '\x1b',
-            ).replace(
-                '[', r'\[',
-            ).replace(
-                '%d', '([0-9]+)',
-            )
-
-            self._escape_sequences_re.append(
-                (re.compile(sequence), v),
-            )
+
+        # The output of a program is read in chunks which may split multibyte
+        # characters, so the decoder keeps the incomplete tail of a chunk
+        # until the rest of the character arrives.
+        self._decoder = codecs.getincrementaldecoder('utf8')(errors='replace')
+
+        self.control_characters = _CONTROL_CHARACTERS
+        self._escape_sequences = _ESCAPE_SEQUENCES
+
+        # The bound methods implementing the capabilities, keyed by the names
+        # of the capabilities. See _exec_method.
+        self._methods = {}
+
+        # The states of the escape sequences trie the _buf content leads to.
+        self._escape_states = []
 
         self._cap_rs1()
 
@@ -124,64 +255,141 @@ class Terminal(
         self._screen[pos] = self._sgr | ord(c)
         self._cursor_right()
 
-    def _build_html(self):  # noqa: C901
-        """Transform the internal representation of the screen into the HTML
-        representation.
-        """
-        self._clean_bit(REVERSE_BIT)
+    def _echo_run(self, text):
+        """Put the specified run of plain ``text`` on the screen as `_echo`
+        would do character by character.
 
-        rows = self._rows
+        The run is written line by line, so each part of it which fits into
+        the current line is put on the screen with a single slice assignment.
+        """
         cols = self._cols
-        r = ''
-
-        span = ''  # ready-to-output characters
-        span_classes = []
-        for i in range(rows * cols):
-            cell = self._screen[i]
-            q, c = divmod(cell, MAGIC_NUMBER)
-            bg, fg = divmod(q, 16)
-
-            current_classes = [
-                f'b{bg}',
-                f'f{fg}',
-            ]
-
-            if self._is_bit_set(UNDERLINE_BIT, cell):
-                current_classes.append('underline')
-
-            if self._is_bit_set(REVERSE_BIT, cell):
-                current_classes[0] = f'b{fg}'
-                current_classes[1] = f'f{bg}'
-
-            if self._is_bit_set(BLINK_BIT, cell):
-                current_classes.append('blink')
-
-            if self._is_bit_set(BOLD_BIT, cell):
-                current_classes.append('bold')
-
-            if i == self._cur_y * cols + self._cur_x and self._cur_visible:
-                current_classes[0], current_classes[1] = 'b1', 'f7'  # cursor
+        start, end = 0, len(text)
+        while start < end:
+            if self._eol:
+                self._cursor_down()
+                self._cur_x = 0
+                if self._eol:
+                    # The cursor is outside of the scrolling region, so the
+                    # characters overwrite one another at the line start.
+                    for c in text[start:]:
+                        self._echo(c)
+                    return
+
+            x = self._cur_x
+            n = min(end - start, cols - x)
+            pos = self._cur_y * cols + x
+            self._screen[pos:pos + n] = _make_cells(self._sgr, text[start:start + n])
+            start += n
+
+            if x + n < cols:
+                self._cur_x = x + n
+            else:
+                self._cur_x = cols - 1
+                self._eol = True
 
-            # If the characteristics of the current cell match the
-            # characteristics of the previous cell, combine them into a group.
-            if span_classes != current_classes or i + 1 == rows * cols:
-                if span:
-                    classes = ' '.join(span_classes)
-                    # Replace spaces with non-breaking spaces.
-                    ch = html.escape(span.replace(' ', '\xa0'))
-                    r += f'<span class="{classes}">{ch}</span>'
-                span = ''
-                span_classes = current_classes.copy()
+    def _decode_screen(self, n):
+        """Split the first ``n`` cells of the screen into their high 32 bits,
+        which define the classes of the cells, and the text made of the low
+        16 bits of the cells.
 
-            if c == 0:
-                span += ' '
+        Returns:
+            A tuple of three items: the list of the high 32 bits of the cells,
+            the text and either None or, if there are characters outside of
+            the BMP on the screen, the list of the low 32 bits of the cells.
 
-            span += chr(c & 0xFFFF)
+        """
+        with memoryview(self._screen) as screen, screen.cast('B') as raw, raw.cast('I') as words:
+            keys = words[_HIGH_WORD:2 * n:2].tolist()
+            cells = raw[:8 * n].tobytes()
+            # The characters outside of the BMP may have zero low 16 bits, but
+            # still are not null characters. They are rare, so the low words
+            # are only taken if there are such characters on the screen.
+            lows = None
+            if cells[_LOW_BYTES[2]::8].strip(b'\0') or cells[_LOW_BYTES[3]::8].strip(b'\0'):
+                lows = words[1 - _HIGH_WORD:2 * n:2].tolist()
+
+        chars = bytearray(4 * n)
+        chars[0::4] = cells[_LOW_BYTES[0]::8]
+        chars[1::4] = cells[_LOW_BYTES[1]::8]
+        return keys, chars.decode('utf-32-le', 'surrogatepass'), lows
+
+    def _iter_parts(self):
+        """Split the screen into parts of the cells with the same classes.
+
+        The parts are the runs of the cells with the same high 32 bits within
+        lines, found by groupby in C, so the Python code only runs once per
+        run rather than once per cell. The cursor is a part of its own.
+
+        Yields:
+            Pairs of the classes and the text of the parts.
 
-            if not (i + 1) % cols:
-                span += '\n'
+        """
+        cols = self._cols
+        n = self._rows * cols
+        keys, text, lows = self._decode_screen(n)
+        cursor = self._cur_y * cols + self._cur_x if self._cur_visible else -1
+
+        # As it has always been, the last cell is left out of the document.
+        last = n - 1
+        for row_start in range(0, last, cols):
+            i = row_start
+            for key, group in groupby(keys[row_start:min(row_start + cols, last)]):
+                run_end = i + len(list(group))
+                classes = _get_classes(key)
+
+                while i < run_end:
+                    if i == cursor:
+                        part_end = i + 1
+                        part_classes = _get_classes(key, cursor=True)
+                    else:
+                        part_end = cursor if i < cursor < run_end else run_end
+                        part_classes = classes
+
+                    part = text[i:part_end]
+                    if not key & 0xFF and '\x00' in part:
+                        # The cells without both a character and emphasis are
+                        # shown as spaces followed by the null characters.
+                        if lows is None:
+                            part = part.replace('\x00', ' \x00')
+                        else:
+                            part = ''.join(
+                                ' \x00' if not lows[j] else text[j] for j in range(i, part_end)
+                            )
+
+                    if part_end == row_start + cols:
+                        part += '\n'
+
+                    yield part_classes, part
+                    i = part_end
+
+    def _build_html(self):
+        """Transform the internal representation of the screen into the HTML
+        representation.
+        """
+        self._sgr &= ~REVERSE_MASK
 
-        return r
+        r = []
+        span = ''  # ready-to-output characters
+        span_classes = None
+        for classes, part in self._iter_parts():
+            # If the characteristics of the current cells match the
+            # characteristics of the previous cells, combine them into a group.
+            if classes == span_classes:
+                span += part
+                continue
+
+            if span:
+                # Replace spaces with non-breaking spaces.
+                ch = html.escape(span.replace(' ', '\xa0'))
+                r.append(f'<span class="{span_classes}">{ch}</span>')
+            span = part
+            span_classes = classes
+
+        if span:
+            ch = html.escape(span.replace(' ', '\xa0'))
+            r.append(f'<span class="{span_classes}">{ch}</span>')
+
+        return ''.join(r)
 
     #
     # User visible methods.
@@ -193,18 +401,38 @@ class Terminal(
         document which is ready to be printed in a user's browser.
 
         The ``buf`` argument is a byte buffer taken from a terminal-oriented
-        program.
+        program. The document is returned encoded in UTF-8, so that it can be
+        sent to the client as is.
         """
-        for i in buf.decode('utf8', errors='replace'):
-            if ord(i) in self.control_characters:
-                self._buf = i
-                self._exec_single_character_command()
-            elif i == '\x1b':
-                self._buf += i
-            elif len(self._buf):
+        text = self._decoder.decode(buf)
+        pos, end = 0, len(text)
+        while pos < end:
+            if not self._buf:
+                # Outside of escape sequences, echo the whole run of plain
+                # text up to the next control or escape character at once.
+                mo = _SPECIAL_CHARACTERS_RE.search(text, pos)
+                stop = mo.start() if mo else end
+                if stop > pos:
+                    self._echo_run(text[pos:stop])
+
+                if stop == end:
+                    break
+
+                pos = stop
+
+            i = text[pos]
+            pos += 1
+            # Control characters, such as 10 (LF, line feed) or 13 (CR,
+            # carriage return), are executed at once and interrupt an escape
+            # sequence.
+            method_name = self.control_characters.get(ord(i))
+            if method_name is not None:
+                self._exec_method(method_name)
+                self._buf = ''
+            elif i == '\x1b' or self._buf:
                 self._buf += i
                 self._exec_escape_sequence()
             else:
                 self._echo(i)
 
-        return self._build_html()
+        return self._build_html().encode()
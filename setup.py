@@ -1,6 +1,6 @@
 """The builds the Kate package."""
 
-from setuptools import setup
+from setuptools import Extension, setup
 
 try:
     import pypandoc
@@ -20,9 +20,19 @@ setup(name='kate',
       maintainer_email='Evgeny Golyshev <eugulixes@gmail.com>',
       license='http://www.apache.org/licenses/LICENSE-2.0',
       scripts=['bin/kateterm.py'],
-      packages=['kate'],
+      packages=['kate', 'kate.core', 'kate.mixins'],
       package_data={'kate': ['linux_console.json']},
+      # The extension is optional: if it cannot be built, Kate falls back to
+      # the pure-Python implementation of the same functions.
+      ext_modules=[
+          Extension('kate.core.speedups', ['kate/core/speedups.c'], optional=True),
+      ],
       install_requires=[
           'PyYAML',
           'tornado',
-      ])
+      ],
+      extras_require={
+          'isal': ['isal'],
+          'uvloop': ['uvloop'],
+          'zlib-ng': ['zlib-ng'],
+      })
@@ -34,9 +34,15 @@ def get_params(**kwargs):
     )
 
 
-def get_writer():
+def get_writer(*, with_socket=False):
     """Return a stream writer."""
     writer = Mock()
+    if with_socket:
+        sock = Mock()
+        sock.family = socket.AF_INET
+        sock.setsockopt = Mock()
+        writer.get_extra_info = Mock(return_value=sock)
+
     writer.write = Mock()
     writer.drain = AsyncMock()
     writer.close = Mock()
@@ -67,17 +73,8 @@ class BaseWebSocketTestCase(unittest.IsolatedAsyncioTestCase):
 
 
 class DummyServer:
-    """The class represents a minimal server stub exposing send_http_error
-    and the socket attribute.
-    """
+    """The class represents a minimal server stub exposing send_http_error."""
 
-    def __init__(self, *, with_socket=False):
+    def __init__(self):
         """Initialize a DummyServer object."""
         self.send_http_error = AsyncMock()
-        self.socket = None
-
-        if with_socket:
-            sock = Mock()
-            sock.family = socket.AF_INET
-            sock.setsockopt = Mock()
-            self.socket = sock
@@ -18,8 +18,8 @@ from kate.core.websocket import _PerMessageDeflateCompressor as Compressor
 from kate.core.websocket import _PerMessageDeflateDecompressor as Decompressor
 from tests.core.base import (
     BaseWebSocketTestCase,
-    DummyServer,
     get_params,
+    get_writer,
 )
 
 
@@ -333,9 +333,9 @@ class WebSocketTest(BaseWebSocketTestCase):  # noqa: PLR0904
 
     async def test_set_nodelay_sets_tcp_flag(self):
         """The protocol should enable TCP_NODELAY on the underlying socket when requested."""
-        server = DummyServer(with_socket=True)
-        handler = _BaseTestHandler(self.headers, self.reader, self.writer, server)
-        protocol = WebSocketProtocol13(handler, False, get_params(), self.reader, self.writer)
+        writer = get_writer(with_socket=True)
+        handler = _BaseTestHandler(self.headers, self.reader, writer, self.server)
+        protocol = WebSocketProtocol13(handler, False, get_params(), self.reader, writer)
 
         connection = AsyncMock()
         connection.is_closing = Mock(return_value=False)
@@ -344,7 +344,7 @@ class WebSocketTest(BaseWebSocketTestCase):  # noqa: PLR0904
         protocol.set_nodelay(True)
         await handler.write_message('hello')
 
-        server.socket.setsockopt.assert_called_once_with(
+        writer.get_extra_info('socket').setsockopt.assert_called_once_with(
             socket.IPPROTO_TCP, socket.TCP_NODELAY, 1,
         )
         connection.write_message.assert_awaited_once_with('hello', binary=False)
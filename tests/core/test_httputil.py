@@ -5,8 +5,10 @@ import unittest
 from kate.core.httputil import (
     HTTPInputError,
     _encode_header,
+    _parse_extension_header,
     _parse_header,
     parse_request_start_line,
+    parse_request_start_line_fast,
 )
 
 
@@ -28,6 +30,18 @@ class TestCoreHTTPUtility(unittest.TestCase):
         expected = 'permessage-deflate; client_max_window_bits=15; client_no_context_takeover'
         self.assertEqual(expected, encoded)
 
+    def test_parse_extension_header_returns_parameters(self):
+        """The function should parse extension parameters the same way
+        _parse_header does.
+        """
+        header = ' permessage-deflate; Client_Max_Window_Bits="10" ; client_no_context_takeover'
+
+        self.assertEqual(_parse_header(header.strip()), _parse_extension_header(header))
+        self.assertEqual(
+            ('permessage-deflate', {'client_max_window_bits': '10'}),
+            _parse_extension_header(header),
+        )
+
     def test_parse_header_decodes_quoted_and_encoded_values(self):
         """The function should decode quoted and RFC 2231 encoded parameters."""
         header = r'form-data; foo="b\\a\"r"; file*=utf-8\'\'T%C3%A4st'
@@ -70,3 +84,31 @@ class TestCoreHTTPUtility(unittest.TestCase):
         self.assertEqual('GET', result.method)
         self.assertEqual('/index.html', result.path)
         self.assertEqual('HTTP/1.1', result.version)
+
+    def test_parse_request_start_line_fast_matches_regex_version(self):
+        """The function should give the same results as parse_request_start_line."""
+        for line in (
+            'GET /index.html HTTP/1.1',
+            'GET /index.html HTTP/1.0',
+            'M-SEARCH * HTTP/1.1',
+            'GET /caf\xe9 HTTP/1.1',
+        ):
+            self.assertEqual(
+                parse_request_start_line(line),
+                parse_request_start_line_fast(line.encode()),
+            )
+
+    def test_parse_request_start_line_fast_rejects_invalid_lines(self):
+        """The function should raise HTTPInputError for the lines
+        parse_request_start_line rejects.
+        """
+        for line in (
+            b'INVALID_REQUEST',
+            b'GET / HTTP/2.0',
+            b'GET  / HTTP/1.1',
+            b'GET / HTTP/1.1 ',
+            b'GET / HTTP/1.x',
+            b'G(T / HTTP/1.1',
+        ):
+            with self.assertRaises(HTTPInputError):
+                parse_request_start_line_fast(line)
@@ -3,6 +3,7 @@
 # ruff: noqa: PLR6301, SLF001
 
 import asyncio
+import socket
 import unittest
 from pathlib import Path
 from unittest.mock import AsyncMock, Mock, patch
@@ -48,6 +49,26 @@ class TestResponse(unittest.TestCase):
         self.assertIn(b'X-Test: yes', head)
         self.assertEqual(payload.encode(), body)
 
+    def test_to_bytes_derives_content_length_from_body(self):
+        """The response should always send the actual length of the body."""
+        response = Response('payload', headers={'Content-Length': '100'})
+        head, _ = response.to_bytes().split(b'\r\n\r\n', 1)
+
+        self.assertEqual(1, head.count(b'Content-Length'))
+        self.assertIn(b'Content-Length: 7', head)
+
+    def test_to_bytes_omits_body_of_informational_response(self):
+        """The response should have the possibility to be serialized without
+        Content-Length and body when its status is informational.
+        """
+        response = Response(status=101, headers={'Upgrade': 'websocket'})
+        self.assertEqual(
+            b'HTTP/1.1 101 Switching Protocols\r\n'
+            b'Connection: close\r\n'
+            b'Upgrade: websocket\r\n\r\n',
+            response.to_bytes(),
+        )
+
 
 class TestServer(unittest.IsolatedAsyncioTestCase):
     """The class implements the BaseServer tests."""
@@ -58,15 +79,17 @@ class TestServer(unittest.IsolatedAsyncioTestCase):
         self.reader = AsyncMock()
         self.writer = get_writer()
 
-    def test_convert_headers_to_dict_returns_mapping(self):
+    def test_parse_headers_returns_mapping(self):
         """The server should have the possibility to split header lines into a dictionary."""
-        lines = [
-            'Host: example.com',
-            'Upgrade: websocket',
-            'Connection: Upgrade',
-            'Invalid header',
-        ]
-        headers = BaseServer._convert_headers_to_dict(lines)
+        request = (
+            b'GET / HTTP/1.1\r\n'
+            b'Host: example.com\r\n'
+            b'Upgrade:websocket  \r\n'
+            b'Connection: Upgrade\r\n'
+            b'Invalid header\r\n'
+            b'\r\n'
+        )
+        headers = BaseServer._parse_headers(request, request.find(b'\r\n') + 2)
 
         self.assertEqual({
             'Host': 'example.com',
@@ -74,6 +97,29 @@ class TestServer(unittest.IsolatedAsyncioTestCase):
             'Connection': 'Upgrade',
         }, headers)
 
+    def test_configure_sockets_sets_send_buffer_size(self):
+        """The server should have the possibility to set the send buffer size
+        of the listening TCP sockets.
+        """
+        tcp_sock = Mock(family=socket.AF_INET)
+        unix_sock = Mock(family=socket.AF_UNIX)
+        server = BaseServer(send_buffer_size=262144)
+
+        server._configure_sockets([tcp_sock, unix_sock])
+
+        tcp_sock.setsockopt.assert_called_once_with(socket.SOL_SOCKET, socket.SO_SNDBUF, 262144)
+        unix_sock.setsockopt.assert_not_called()
+
+    def test_configure_sockets_keeps_send_buffer_autotuning_by_default(self):
+        """The server should leave the send buffer size to the kernel unless it
+        is specified.
+        """
+        sock = Mock(family=socket.AF_INET)
+
+        self.server._configure_sockets([sock])
+
+        sock.setsockopt.assert_not_called()
+
     async def test_handle_request_incomplete_read_returns_none(self):
         """The server should have the possibility to return None when
         the client disconnects early.
@@ -2,7 +2,12 @@
 
 import unittest
 
-from kate.core.util import _websocket_mask_python
+from kate.core.util import _websocket_mask_inplace_python, _websocket_mask_python
+
+try:
+    from kate.core import speedups
+except ImportError:
+    speedups = None
 
 
 class TestPythonMaskFunction(unittest.TestCase):
@@ -13,6 +18,11 @@ class TestPythonMaskFunction(unittest.TestCase):
         """Apply the Python websocket mask function to the given data with the specified mask."""
         return _websocket_mask_python(mask, data)
 
+    @staticmethod
+    def mask_inplace(mask, buf):
+        """Apply the Python in-place websocket mask function to the given buffer."""
+        _websocket_mask_inplace_python(mask, buf)
+
     def test_mask(self):
         """Test the websocket mask function with various inputs and expected outputs."""
         self.assertEqual(self.mask(b'abcd', b''), b'')
@@ -38,3 +48,59 @@ class TestPythonMaskFunction(unittest.TestCase):
 
         masked = _websocket_mask_python(mask, data)
         self.assertEqual(_websocket_mask_python(mask, masked), data)
+
+    def test_mask_long_payload(self):
+        """Test the websocket mask function with a payload which is not a multiple of the mask."""
+        mask = b'\x9a\x00\x7f\xe1'
+        data = bytes(range(256)) * 16 + b'tail'
+
+        want = bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+        self.assertEqual(want, self.mask(mask, data))
+
+    def test_mask_with_zero_mask(self):
+        """Test that masking with a zero mask returns the data unchanged."""
+        data = b'hello websocket'
+        self.assertIs(data, self.mask(b'\x00\x00\x00\x00', data))
+
+        buf = bytearray(data)
+        self.mask_inplace(b'\x00\x00\x00\x00', buf)
+        self.assertEqual(data, buf)
+
+    def test_mask_inplace(self):
+        """Test that the in-place websocket mask function masks only the specified part
+        of a buffer.
+        """
+        mask = b'\x9a\x00\x7f\xe1'
+        data = bytes(range(256)) * 4 + b'tail'
+        buf = bytearray(b'head' + data)
+
+        self.mask_inplace(mask, memoryview(buf)[4:])
+        self.assertEqual(b'head' + self.mask(mask, data), buf)
+
+
+@unittest.skipIf(speedups is None, 'the C extension is not built')
+class TestCMaskFunction(TestPythonMaskFunction):
+    """The class implements the tests for the websocket mask function from the C extension."""
+
+    @staticmethod
+    def mask(mask, data):
+        """Apply the C websocket mask function to the given data with the specified mask."""
+        return speedups.websocket_mask(mask, data)
+
+    @staticmethod
+    def mask_inplace(mask, buf):
+        """Apply the C in-place websocket mask function to the given buffer."""
+        speedups.websocket_mask_inplace(mask, buf)
+
+    def test_mask_rejects_invalid_mask_length(self):
+        """Test that the C websocket mask function accepts only 4-byte masks."""
+        with self.assertRaises(ValueError):
+            self.mask(b'abc', b'data')
+
+        with self.assertRaises(ValueError):
+            self.mask_inplace(b'abc', bytearray(b'data'))
+
+    def test_mask_inplace_rejects_read_only_buffer(self):
+        """Test that the C in-place websocket mask function accepts only writable buffers."""
+        with self.assertRaises(TypeError):
+            self.mask_inplace(b'abcd', b'data')
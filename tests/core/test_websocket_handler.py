@@ -118,6 +118,18 @@ class TestWebSocketHandler(BaseWebSocketTestCase):  # noqa: PLR0904
             self.writer, 400, '"Connection" must be "Upgrade".',
         )
 
+    async def test_get_rejects_when_connection_header_only_contains_upgrade(self):
+        """The handler should have the possibility to reject the request when
+        'upgrade' is only a part of a token in the Connection header.
+        """
+        headers = dict(self.headers, Connection='keep-alive, notupgrade')
+        handler = WebSocketHandler(headers, self.reader, self.writer, self.server)
+        await handler.get()
+
+        self.server.send_http_error.assert_awaited_once_with(
+            self.writer, 400, '"Connection" must be "Upgrade".',
+        )
+
     async def test_get_rejects_when_origin_is_invalid(self):
         """The handler should have the possibility to reject the request when
         the Origin does not match the Host.
@@ -207,9 +219,9 @@ class TestWebSocketHandler(BaseWebSocketTestCase):  # noqa: PLR0904
                 headers = dict(self.headers, **{'Sec-WebSocket-Version': websocket_version})
                 handler = WebSocketHandler(headers, self.reader, self.writer, self.server)
                 handler.settings = {
-                    'ping_interval': 1.5,
-                    'ping_timeout': 5.0,
-                    'max_message_size': 12345,
+                    'websocket_ping_interval': 1.5,
+                    'websocket_ping_timeout': 5.0,
+                    'websocket_max_message_size': 12345,
                 }
                 handler.get_compression_options = Mock(
                     return_value={'compression_level': 1},
@@ -390,3 +402,32 @@ class TestWebSocketHandler(BaseWebSocketTestCase):  # noqa: PLR0904
 
         await self.handler.write_message('hello')
         mock_connection.write_message.assert_awaited_once_with('hello', binary=False)
+
+    async def test_write_text_sends_utf8_text_frame(self):
+        """The handler should have the possibility to send text encoded in UTF-8
+        bypassing the message type checks.
+        """
+        mock_connection = AsyncMock()
+        mock_connection.is_closing = Mock(return_value=False)
+        self.handler.ws_connection = mock_connection
+
+        await self.handler.write_text('héllo')
+        mock_connection.write_data.assert_awaited_once_with(0x1, 'héllo'.encode())
+
+    async def test_write_bytes_sends_binary_frame(self):
+        """The handler should have the possibility to send binary data bypassing
+        the message type checks.
+        """
+        mock_connection = AsyncMock()
+        mock_connection.is_closing = Mock(return_value=False)
+        self.handler.ws_connection = mock_connection
+
+        await self.handler.write_bytes(b'\x00\x01')
+        mock_connection.write_data.assert_awaited_once_with(0x2, b'\x00\x01')
+
+    async def test_write_text_raises_when_connection_is_closed(self):
+        """The handler should raise WebSocketClosedError when trying to
+        send text on a closed connection.
+        """
+        with self.assertRaises(WebSocketClosedError):
+            await self.handler.write_text('hi')
@@ -25,7 +25,7 @@ from kate.core.websocket import (
 )
 from kate.core.websocket import _PerMessageDeflateCompressor as Compressor
 from kate.core.websocket import _PerMessageDeflateDecompressor as Decompressor
-from tests.core.base import BaseWebSocketTestCase, DummyServer, get_params
+from tests.core.base import BaseWebSocketTestCase, get_params, get_writer
 
 _MAGIC_WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
 
@@ -100,6 +100,9 @@ class TestWebSocketProtocolBase(BaseWebSocketTestCase):
         async def write_message(self, _message, _binary=False):  # noqa: FBT002
             """Write a message."""
 
+        async def write_data(self, _opcode, _message):
+            """Write an encoded message."""
+
         @property
         def selected_subprotocol(self):
             """Return the selected subprotocol."""
@@ -215,27 +218,28 @@ class TestWebSocketProtocolBase(BaseWebSocketTestCase):
             protocol._process_server_headers(key, headers)
 
     def test_set_nodelay_sets_tcp_nodelay_on_inet_sockets(self):
-        """The protocol should have the possibility to toggle TCP_NODELAY on the server
-        socket when applicable.
+        """The protocol should have the possibility to toggle TCP_NODELAY on the socket
+        of the connection when applicable.
         """
-        server = DummyServer(with_socket=True)
-        handler = WebSocketHandler(Mock(), self.reader, self.writer, server)
+        writer = get_writer(with_socket=True)
+        handler = WebSocketHandler(Mock(), self.reader, writer, self.server)
         protocol = WebSocketProtocol13(
             handler,
             False,
             get_params(),
             self.reader,
-            self.writer,
+            writer,
         )
+        sock = writer.get_extra_info('socket')
         params = (socket.IPPROTO_TCP, socket.TCP_NODELAY)
 
         protocol.set_nodelay(True)
-        server.socket.setsockopt.assert_called_once_with(*params, 1)
+        sock.setsockopt.assert_called_once_with(*params, 1)
 
-        server.socket.setsockopt.reset_mock()
+        sock.setsockopt.reset_mock()
 
         protocol.set_nodelay(False)
-        server.socket.setsockopt.assert_called_once_with(*params, 0)
+        sock.setsockopt.assert_called_once_with(*params, 0)
 
 
 class TestWebSocketProtocol13Handshake(BaseWebSocketTestCase):
@@ -592,6 +596,32 @@ class TestWebSocketProtocol13Writing(BaseWebSocketTestCase):
         self.assertEqual(second_byte & BitMask.MASK, MaskBit.MASKED)
         self.assertEqual(second_byte & BitMask.PAYLOAD_LEN, len(data))
 
+    async def test_write_frame_skips_drain_when_buffer_is_empty(self):
+        """The frame writer should not wait for the writer to drain when the transport
+        has already sent everything.
+        """
+        self.writer.transport.is_closing = Mock(return_value=False)
+        self.writer.transport.get_write_buffer_size = Mock(return_value=0)
+        await self.protocol._write_frame(fin=True, opcode=Opcode.TEXT, data=b'data')
+        self.writer.drain.assert_not_awaited()
+
+        self.writer.transport.get_write_buffer_size = Mock(return_value=4)
+        await self.protocol._write_frame(fin=True, opcode=Opcode.TEXT, data=b'data')
+        self.writer.drain.assert_awaited_once()
+
+    async def test_write_frame_masks_extended_payload(self):
+        """The frame writer should put the mask after the extended payload length
+        and mask the payload with it.
+        """
+        data = bytes(range(256)) * 2
+        self.protocol.mask_outgoing = True
+        await self.protocol._write_frame(fin=True, opcode=Opcode.BINARY, data=data)
+
+        frame = self.writer.write.call_args_list[-1].args[0]
+        self.assertEqual(len(frame), 8 + len(data))
+        self.assertEqual(struct.unpack('!H', frame[2:4])[0], len(data))
+        self.assertEqual(_websocket_mask_python(frame[4:8], frame[8:]), data)
+
     async def test_write_frame_encodes_short_payload_length_not_final(self):
         """The frame writer should encode short payload length with FIN flag
         unset for non-final frame.
@@ -682,6 +712,31 @@ class TestWebSocketProtocol13Reading(BaseWebSocketTestCase):  # noqa: PLR0904
 
         mock_on_message.assert_awaited_once_with(payload)
 
+    async def test_receive_frame_passes_fragmented_binary_payload_as_bytes(self):
+        """The protocol should have the possibility to forward binary messages
+        assembled from fragments to on_message as bytes.
+        """
+        payload1 = b'fragment1'
+        header1 = struct.pack('BB', Opcode.BINARY, MaskBit.UNMASKED | len(payload1))
+
+        payload2 = b'fragment2'
+        header2 = struct.pack(
+            'BB',
+            FinalBit.FINAL | Opcode.CONTINUATION,
+            MaskBit.UNMASKED | len(payload2),
+        )
+
+        frames = [header1, payload1, header2, payload2]
+        with (
+            patch.object(self.protocol, '_read_bytes', AsyncMock(side_effect=frames)),
+            patch.object(self.handler, 'on_message', AsyncMock()) as mock_on_message,
+        ):
+            await self.protocol._receive_frame()
+            await self.protocol._receive_frame()
+
+        mock_on_message.assert_awaited_once_with(payload1 + payload2)
+        self.assertIs(type(mock_on_message.await_args.args[0]), bytes)
+
     async def test_receive_frame_aborts_on_invalid_utf8(self):
         """The protocol should have the possibility to abort the connection when
         a text frame payload fails UTF-8 decoding.
@@ -765,6 +820,35 @@ class TestWebSocketProtocol13Reading(BaseWebSocketTestCase):  # noqa: PLR0904
         mock_handle_message.assert_called_once_with(Opcode.TEXT, bytearray(payload1 + payload2))
         self.assertIsNone(self.protocol._fragmented_message_buffer)
 
+    async def test_receive_frame_unmasks_fragments_with_their_own_masks(self):
+        """The protocol should have the possibility to unmask every fragment of a message
+        with the mask of its frame.
+        """
+        mask1 = b'\x01\x02\x03\x04'
+        payload1 = b'fragment1'
+        header1 = struct.pack('BB', Opcode.BINARY, MaskBit.MASKED | len(payload1))
+
+        mask2 = b'\xfa\xfb\xfc\xfd'
+        payload2 = b'fragment2'
+        header2 = struct.pack(
+            'BB',
+            FinalBit.FINAL | Opcode.CONTINUATION,
+            MaskBit.MASKED | len(payload2),
+        )
+
+        frames = [
+            header1, mask1, _websocket_mask_python(mask1, payload1),
+            header2, mask2, _websocket_mask_python(mask2, payload2),
+        ]
+        with (
+            patch.object(self.protocol, '_read_bytes', AsyncMock(side_effect=frames)),
+            patch.object(self.protocol, '_handle_message') as mock_handle_message,
+        ):
+            await self.protocol._receive_frame()
+            await self.protocol._receive_frame()
+
+        mock_handle_message.assert_called_once_with(Opcode.BINARY, payload1 + payload2)
+
     async def test_receive_frame_processes_close_and_records_code_reason(self):
         """The protocol should have the possibility to process close frames by invoking close
         with the received code and storing the close code and reason.
@@ -897,6 +981,31 @@ class TestWebSocketProtocol13Reading(BaseWebSocketTestCase):  # noqa: PLR0904
         self.assertEqual(mock_read_bytes.await_args_list[1].args, (8, ))
         self.assertEqual(mock_read_bytes.await_args_list[2].args, (len(payload), ))
 
+    async def test_receive_frame_reads_extended_length_and_mask_at_once(self):
+        """The protocol should have the possibility to read the extended length field
+        together with the mask which follows it.
+        """
+        header = struct.pack('BB', FinalBit.FINAL | Opcode.BINARY, MaskBit.MASKED | 126)
+
+        mask = b'\x01\x02\x03\x04'
+        payload = b'a' * 130
+        extended_len_and_mask = struct.pack('!H', len(payload)) + mask
+        with (
+            patch.object(self.protocol, '_handle_message') as mock_handle_message,
+            patch.object(
+                self.protocol,
+                '_read_bytes',
+                AsyncMock(side_effect=[
+                    header, extended_len_and_mask, _websocket_mask_python(mask, payload),
+                ]),
+            ) as mock_read_bytes,
+        ):
+            await self.protocol._receive_frame()
+
+        self.assertIs(mock_read_bytes.await_count, 3)
+        self.assertEqual(mock_read_bytes.await_args_list[1].args, (6, ))
+        mock_handle_message.assert_called_once_with(Opcode.BINARY, payload)
+
     async def test_receive_frame_aborts_on_unexpected_continuation(self):
         """The protocol should abort if it receives a continuation frame without a
         preceding data frame.
@@ -1253,7 +1362,7 @@ class TestWebSocketProtocol13PeriodicPinging(BaseWebSocketTestCase):
             self.assertIs(protocol._ping_coroutine, old_task)
 
 
-class TestWebSocketProtocol13Compression(BaseWebSocketTestCase):
+class TestWebSocketProtocol13Compression(BaseWebSocketTestCase):  # noqa: PLR0904
     """The class implements the tests for WebSocket compression functionality."""
 
     def test_get_compressor_options_server_role_values(self):
@@ -1367,7 +1476,11 @@ class TestWebSocketProtocol13Compression(BaseWebSocketTestCase):
         """The compressor should have the possibility to accept a valid max_wbits and
         configure persistent mode.
         """
-        with patch.object(zlib, 'compressobj', Mock()) as mock_compressobj:
+        with (
+            patch('kate.core.websocket.isal_zlib', None),
+            patch('kate.core.websocket._zlib', zlib),
+            patch.object(zlib, 'compressobj', Mock()) as mock_compressobj,
+        ):
             compressor_persistent = Compressor(persistent=True, max_wbits=9)
 
         self.assertIsNotNone(compressor_persistent._compressor)
@@ -1380,10 +1493,60 @@ class TestWebSocketProtocol13Compression(BaseWebSocketTestCase):
                 'compression_level': 6,
                 'mem_level': 8,
             })
-        self.assertIsNone(compressor_nonpersistent._compressor)
+        self.assertIsNotNone(compressor_nonpersistent._compressor)
+        self.assertEqual(compressor_persistent._flush_mode, zlib.Z_SYNC_FLUSH)
+        self.assertEqual(compressor_nonpersistent._flush_mode, zlib.Z_FULL_FLUSH)
         self.assertEqual(compressor_nonpersistent._compression_level, 6)
         self.assertEqual(compressor_nonpersistent._mem_level, 8)
 
+    def test_compressor_leaves_level_zero_to_zlib(self):
+        """The compressor should have the possibility to use ISA-L only for the
+        levels which compress data, since level 0 means no compression in
+        zlib.
+        """
+        isal_zlib = Mock(ISAL_BEST_SPEED=0, ISAL_BEST_COMPRESSION=3)
+        with patch('kate.core.websocket.isal_zlib', isal_zlib):
+            stored = Compressor(persistent=True, max_wbits=None, compression_options={
+                'compression_level': 0,
+            })
+            compressed = Compressor(persistent=True, max_wbits=None, compression_options={
+                'compression_level': 1,
+            })
+
+            self.assertIsNot(isal_zlib, stored._compressor_module())
+            self.assertIs(isal_zlib, compressed._compressor_module())
+
+    def test_compressor_without_context_takeover_resets_history(self):
+        """The compressor should have the possibility to reuse its compression
+        object without letting a message refer to the previous ones.
+        """
+        compressor = Compressor(persistent=False, max_wbits=15)
+        payload = b'hello world' * 10
+
+        for _ in range(3):
+            compressed = compressor.compress(payload)
+            decompressor = zlib.decompressobj(-15)
+            self.assertEqual(payload, decompressor.decompress(compressed + b'\x00\x00\xff\xff'))
+
+    def test_compressors_without_context_takeover_share_compression_object(self):
+        """The compressors without context takeover should have the possibility
+        to share a compression object, while persistent ones keep their own.
+        """
+        compressor1 = Compressor(persistent=False, max_wbits=15)
+        compressor2 = Compressor(persistent=False, max_wbits=15)
+        self.assertIs(compressor1._compressor, compressor2._compressor)
+        self.assertIsNot(
+            Compressor(persistent=True, max_wbits=15)._compressor,
+            Compressor(persistent=True, max_wbits=15)._compressor,
+        )
+
+        payload1 = b'hello world' * 10
+        payload2 = b'goodbye world' * 10
+        for compressor, payload in ((compressor1, payload1), (compressor2, payload2)):
+            compressed = compressor.compress(payload)
+            decompressor = zlib.decompressobj(-15)
+            self.assertEqual(payload, decompressor.decompress(compressed + b'\x00\x00\xff\xff'))
+
     def test_compressor_compress_trims_zlib_sync_flush_trailer(self):
         """The compressor should have the possibility to trim the zlib sync-flush
         `0x00 0x00 0xff 0xff` trailer.
@@ -1450,6 +1613,17 @@ class TestWebSocketProtocol13Compression(BaseWebSocketTestCase):
         with self.assertRaises(_DecompressTooLargeError):
             decompressor.decompress(compressed_message)
 
+    def test_decompressor_accepts_result_of_max_message_size(self):
+        """The decompressor should have the possibility to return the uncompressed result
+        which is exactly as long as the configured maximum_message_size.
+        """
+        payload_message = b'a' * 1024
+        compressor = Compressor(persistent=False, max_wbits=15)
+        compressed_message = compressor.compress(payload_message)
+
+        decompressor = Decompressor(persistent=False, max_wbits=15, max_message_size=1024)
+        self.assertEqual(decompressor.decompress(compressed_message), payload_message)
+
     def test_decompressor_multiple_calls_do_not_leave_unconsumed_tail(self):
         """The decompressor should have the possibility to fully consume input without
         leaving unconsumed tail.
@@ -202,26 +202,6 @@ class Helper(unittest.TestCase):
         # Restore the initial position of the screen.
         term._zero((0, 0), (term._right_most, term._bottom_most))
 
-    def _check_scroll_right(self, s, pos):
-        """A helper that checks the `_scroll_right` method.
-
-        The ``s`` argument is a test string to be put on the screen.
-        The ``pos`` argument is a tuple or list of coordinates ``(x, y)``
-        of the location where you want the string to be.
-        """
-        x, y = pos
-        term = self._terminal
-
-        self._put_string(s, pos)
-        self._check_string(s, pos, (x + len(s), y))
-
-        term._scroll_right(x, y)
-
-        self._check_string(s, (x + 1, y), (x + len(s) + 1, y))
-
-        # Restore the initial position of the screen.
-        term._zero((0, 0), (term._right_most, term._bottom_most))
-
     @reset_after_executing
     def _check_scroll_up(self, s, pos):
         """A helper that checks the `_scroll_up` method.
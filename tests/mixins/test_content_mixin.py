@@ -17,8 +17,11 @@
 
 # ruff: noqa: S311, SLF001
 
+import array
 import random
 
+from kate.constants import BLACK_AND_WHITE
+from kate.terminal import Terminal
 from tests.helper import Helper
 
 
@@ -39,6 +42,22 @@ class TestContentMixin(Helper):
 
         self._check_cap_csr((self._rows, self._rows))
 
+    def test_cap_csr_treats_zero_as_default(self):
+        """The terminal should treat 0 as the default top or bottom line of
+        the scrolling region, so that scrolling keeps the size of the screen.
+        """
+        term = Terminal(rows=3, cols=4)
+
+        term.generate_html(b'\x1b[0;0r')
+        self.assertEqual(0, term._top_most)
+        self.assertEqual(2, term._bottom_most)
+
+        term.generate_html(b'\x1b[0;7rab\r\ncd\r\nef\r\ngh')
+        self.assertEqual(0, term._top_most)
+        self.assertEqual(2, term._bottom_most)
+        self.assertEqual(3 * 4, len(term._screen))
+        self.assertEqual(ord('c'), term._screen[0] & 0xFFFFFFFF)
+
     def test_cap_dch(self):
         """The terminal should have the possibility to delete the specified
         number of characters.
@@ -135,6 +154,47 @@ class TestContentMixin(Helper):
         want = blank_characters + ['x'] * (self._cols - n)
         self._check_string(want, (0, 0), (term._cols, 0))
 
+    def test_cap_ich_drops_characters_beyond_right_margin(self):
+        """The characters pushed beyond the right margin should be lost rather
+        than moved to the next line.
+        """
+        term = self._terminal
+        length = len(term._screen)
+
+        self._put_string(['x'] * term._cols, (0, term._bottom_most))
+        term._cur_x, term._cur_y = 2, term._bottom_most
+
+        term._cap_ich(term._cols)
+
+        want = ['x'] * 2 + ['\x00'] * (term._cols - 2)
+        self._check_string(want, (0, term._bottom_most), (term._cols, term._bottom_most))
+        self.assertEqual(length, len(term._screen))
+
+    def test_cap_il(self):
+        """The terminal should have the possibility to add ``n`` number of
+        new blank lines.
+        """
+        term = self._terminal
+
+        self._put_string(['a'] * term._cols, (0, 0))
+        term._eol = False
+        self._put_string(['b'] * term._cols, (0, 1))
+        term._eol = False
+        term._cur_x = term._cur_y = 0
+
+        term._cap_il(2)
+
+        self._check_string(['\x00'] * term._cols, (0, 0), (term._cols, 0))
+        self._check_string(['\x00'] * term._cols, (0, 1), (term._cols, 1))
+        self._check_string(['a'] * term._cols, (0, 2), (term._cols, 2))
+        self._check_string(['b'] * term._cols, (0, 3), (term._cols, 3))
+
+        # Adding more lines than the scrolling region has clears it.
+        term._cap_il(term._rows + 1)
+
+        want = array.array('Q', [BLACK_AND_WHITE]) * (term._rows * term._cols)
+        self.assertEqual(want, term._screen)
+
     def test_cap_il1(self):
         """The terminal should have the possibility to add a new blank line."""
         term = self._terminal
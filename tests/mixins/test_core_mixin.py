@@ -38,3 +38,17 @@ class TestCoreMixin(Helper):
         self.assertEqual(0, self._terminal._cur_x)
         self.assertEqual(0, self._terminal._cur_y)
         self.assertFalse(self._terminal._eol)
+
+    def test_exec_method(self):
+        """The terminal should execute the capability with the specified name
+        and remember the method implementing it.
+        """
+        term = self._terminal
+        term._cur_x = 5
+
+        term._exec_method('cr')
+        self.assertEqual(0, term._cur_x)
+        self.assertEqual(term._cap_cr, term._methods['cr'])
+
+        term._exec_method('cuf', [3])
+        self.assertEqual(3, term._cur_x)
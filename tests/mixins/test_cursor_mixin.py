@@ -79,6 +79,13 @@ class TestCursorMixin(Helper):
         term._cap_cuf(1)
         self.assertTrue(term._eol)
 
+        # Moving the cursor far beyond the right side of the screen stops it
+        # there as well.
+        term._cur_x, term._eol = 0, False
+        term._cap_cuf(term._cols * 2)
+        self.assertEqual(term._cur_x, term._right_most)
+        self.assertTrue(term._eol)
+
     def test_cap_cup(self):
         """The terminal should have the possibility to set the vertical and
         horizontal positions of the cursor to the specified values.
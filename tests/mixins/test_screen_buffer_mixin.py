@@ -43,6 +43,25 @@ class TestScreenBufferMixin(Helper):
         rand_len = random.randint(1, term._right_most - rand_x)
         self._check_zero(['a'] * rand_len, (rand_x, rand_y))
 
+    def test_move(self):
+        """The terminal should have the possibility to move cells of the screen
+        to an overlapping area in both directions.
+        """
+        term = self._terminal
+        term._screen = array.array('Q', range(len(term._screen)))
+        want = term._screen.tolist()
+
+        term._move(2, 0, 10)
+        want[2:12] = want[0:10]
+        self.assertEqual(want, term._screen.tolist())
+
+        term._move(0, 3, 10)
+        want[0:10] = want[3:13]
+        self.assertEqual(want, term._screen.tolist())
+
+        # The screen can still be resized after the move.
+        term._screen.append(0)
+
     def test_scroll_up(self):
         """The terminal should have the possibility to move an area by
         1 line up.
@@ -69,19 +88,6 @@ class TestScreenBufferMixin(Helper):
         rand_y = random.randint(2, term._bottom_most - 2)
         self._check_scroll_down(['r'] * term._right_most, (0, rand_y))
 
-    def test_scroll_right(self):
-        """The terminal should have the possibility to move an area by
-        1 position right.
-        """
-        term = self._terminal
-
-        self._check_scroll_right('test', (0, 0))
-
-        s = 'test'
-        self._check_scroll_right(s,
-                                 (random.randint(1, term._right_most - len(s)),
-                                  random.randint(1, term._bottom_most)))
-
     def test_peek(self):
         """The terminal should have the possibility to capture the area of the
         screen from a left border starting at position x1, y1 to a right border
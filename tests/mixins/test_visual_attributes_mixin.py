@@ -20,7 +20,7 @@
 import array
 import random
 
-from kate.constants import BLACK_AND_WHITE, BLINK_BIT, BOLD_BIT, REVERSE_BIT, UNDERLINE_BIT
+from kate.constants import BLACK_AND_WHITE, BLINK_MASK, BOLD_MASK, REVERSE_MASK, UNDERLINE_MASK
 from tests.helper import Helper
 
 
@@ -31,13 +31,13 @@ class TestVisualAttributesMixin(Helper):
         """The terminal should have the possibility to produce blinking text."""
         term = self._terminal
         term._cap_blink()
-        self.assertTrue(term._is_bit_set(BLINK_BIT, term._sgr))
+        self.assertTrue(term._sgr & BLINK_MASK)
 
     def test_cap_bold(self):
         """The terminal should have the possibility to produce bold text."""
         term = self._terminal
         term._cap_bold()
-        self.assertTrue(term._is_bit_set(BOLD_BIT, term._sgr))
+        self.assertTrue(term._sgr & BOLD_MASK)
 
     def test_cap_ed(self):
         """The terminal should have the possibility to clear the screen from
@@ -104,7 +104,7 @@ class TestVisualAttributesMixin(Helper):
         """The terminal should have the possibility to enable Reverse Video mode."""
         term = self._terminal
         term._cap_rev()
-        self.assertTrue(term._is_bit_set(REVERSE_BIT, term._sgr))
+        self.assertTrue(term._sgr & REVERSE_MASK)
 
     def test_cap_sgr0(self):
         """The terminal should have the possibility to turn off all attributes."""
@@ -121,6 +121,6 @@ class TestVisualAttributesMixin(Helper):
         """
         term = self._terminal
         term._cap_smul()
-        self.assertTrue(term._is_bit_set(UNDERLINE_BIT, term._sgr))
+        self.assertTrue(term._sgr & UNDERLINE_MASK)
         term._cap_rmul()
-        self.assertFalse(term._is_bit_set(UNDERLINE_BIT, term._sgr))
+        self.assertFalse(term._sgr & UNDERLINE_MASK)
@@ -14,7 +14,7 @@ from tests.core.original_websocket_tests import (
 from tests.core.test_escape import TestCoreEscape
 from tests.core.test_httputil import TestCoreHTTPUtility
 from tests.core.test_server import TestResponse, TestServer
-from tests.core.test_util import TestPythonMaskFunction
+from tests.core.test_util import TestCMaskFunction, TestPythonMaskFunction
 from tests.core.test_websocket_handler import TestWebSocketHandler
 from tests.core.test_websocket_protocol13 import (
     TestWebSocketProtocol13Close,
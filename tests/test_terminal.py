@@ -20,6 +20,8 @@
 import random
 import unittest
 
+from kate.constants import UNDERLINE_MASK
+from kate.terminal import Terminal
 from tests.helper import Helper
 
 
@@ -64,6 +66,162 @@ class TestTerminal(Helper):
         self.assertEqual(1, term._cur_y)
         self.assertFalse(term._eol)
 
+    def test_echo_run(self):
+        """The terminal should have the possibility to put a run of characters
+        on the screen, wrapping it at the end of a line, as if the characters
+        were echoed one by one.
+        """
+        term = self._terminal
+        text = self._get_random_string(term._cols + 5)
+        term._cur_x = 3
+
+        term._echo_run(text)
+
+        want = Terminal(rows=term._rows, cols=term._cols)
+        want._cur_x = 3
+        for c in text:
+            want._echo(c)
+
+        self.assertEqual(want._screen, term._screen)
+        self.assertEqual((want._cur_x, want._cur_y), (term._cur_x, term._cur_y))
+        self.assertEqual(want._eol, term._eol)
+
+    def test_echo_run_after_cursor_moved_to_column_zero(self):
+        """The terminal should treat the column 0 as the first one, so that
+        the characters echoed after that don't change the size of the screen.
+        """
+        term = Terminal(rows=3, cols=4)
+
+        term.generate_html(b'\x1b[1;0Hfoo')
+
+        self.assertEqual(3 * 4, len(term._screen))
+        self.assertEqual(ord('f'), term._screen[0] & 0xFFFFFFFF)
+        self.assertEqual(3, term._cur_x)
+
+    def test_sequences_are_shared(self):
+        """The terminals should share the control characters and escape
+        sequences instead of loading and compiling them on their own.
+        """
+        term = self._terminal
+        other = Terminal(self._rows, self._cols)
+
+        self.assertIs(term.control_characters, other.control_characters)
+        self.assertIs(term._escape_sequences, other._escape_sequences)
+
+    def test_generate_html_executes_static_sequence(self):
+        """The terminal should prefer a static escape sequence to an escape
+        sequence with parameters matching the same input.
+        """
+        term = self._terminal
+
+        # \E[4m is smul, while \E[%dm would be set_color(4).
+        term.generate_html(b'\x1b[4m')
+
+        self.assertTrue(term._sgr & UNDERLINE_MASK)
+        self.assertEqual('', term._buf)
+
+    def test_generate_html_executes_sequence_with_parameters(self):
+        """The terminal should pass the numeric parameters of an escape
+        sequence to the corresponding capability.
+        """
+        term = self._terminal
+
+        term.generate_html(b'\x1b[5;12H')
+        self.assertEqual(11, term._cur_x)
+        self.assertEqual(4, term._cur_y)
+
+        term.generate_html(b'\x1b[20d')
+        self.assertEqual(19, term._cur_y)
+        self.assertEqual('', term._buf)
+
+    def test_generate_html_applies_colors_to_output(self):
+        """The terminal should put the characters following a color escape
+        sequence on the screen with that color.
+        """
+        term = self._terminal
+        want = Terminal(self._rows, self._cols)
+        want._set_color(31)
+
+        term.generate_html(b'\x1b[31mA')
+
+        self.assertEqual(want._sgr | ord('A'), term._screen[0])
+        self.assertEqual(1, term._cur_x)
+
+    def test_generate_html_handles_sequence_containing_escape(self):
+        """The terminal should recognize escape sequences which contain
+        more than one escape character.
+        """
+        term = self._terminal
+
+        term.generate_html(b'\x1b[?25h\x1b[?0cA')
+
+        self.assertEqual('', term._buf)
+        self.assertEqual(1, term._cur_x)
+
+    def test_generate_html_splits_sequence_between_calls(self):
+        """The terminal should recognize an escape sequence which arrives in
+        several chunks.
+        """
+        term = self._terminal
+
+        term.generate_html(b'\x1b[1')
+        term.generate_html(b'0;2')
+        term.generate_html(b'0HA')
+
+        self.assertEqual(20, term._cur_x)
+        self.assertEqual(9, term._cur_y)
+
+    def test_generate_html_echoes_plain_text(self):
+        """The terminal should put runs of plain text on the screen and
+        execute the control characters between them.
+        """
+        term = self._terminal
+
+        term.generate_html(b'ab\r\ncd\x1b[1mef')
+
+        self.assertEqual(ord('a'), term._screen[0] & 0xFFFFFFFF)
+        self.assertEqual(ord('b'), term._screen[1] & 0xFFFFFFFF)
+        self.assertEqual(ord('c'), term._screen[self._cols] & 0xFFFFFFFF)
+        self.assertEqual(ord('f'), term._screen[self._cols + 3] & 0xFFFFFFFF)
+        self.assertEqual(4, term._cur_x)
+        self.assertEqual(1, term._cur_y)
+
+    def test_generate_html_joins_split_characters(self):
+        """The terminal should put a multibyte character on the screen even if
+        it arrives in several chunks.
+        """
+        term = self._terminal
+
+        term.generate_html('é'.encode()[:1])
+        self.assertEqual(0, term._cur_x)
+
+        term.generate_html('é'.encode()[1:])
+        self.assertEqual(ord('é'), term._screen[0] & 0xFFFFFFFF)
+        self.assertEqual(1, term._cur_x)
+
+    def test_generate_html_returns_utf8(self):
+        """The terminal should return the HTML document encoded in UTF-8."""
+        html = self._terminal.generate_html('é'.encode())
+
+        self.assertIsInstance(html, bytes)
+        self.assertTrue(html.startswith('<span class="b0 f7">é</span>'.encode()))
+
+    def test_build_html(self):
+        """The terminal should group the cells with the same classes into spans,
+        end every line with a line feed and highlight the cursor.
+        """
+        term = Terminal(rows=2, cols=4)
+        term.generate_html(b'a\x1b[1mb\x1b[0m c')
+
+        self.assertEqual(
+            '<span class="b0 f7">a</span>'
+            '<span class="b0 f15 bold">b</span>'
+            '<span class="b0 f7">\xa0</span>'
+            '<span class="b1 f7">c\n</span>'
+            '<span class="b0 f7">\xa0\x00\xa0\x00\xa0\x00</span>',
+            term._build_html(),
+        )
+
 
 if __name__ == '__main__':
     unittest.main()